@@ -1,9 +1,110 @@
 # Analytical Module - Handles user interactions and habit tracking
+import contextlib
 import logging
 LOG_LEVEL = logging.DEBUG  
 logging.basicConfig(level=LOG_LEVEL)
-from datetime import datetime, date 
+from datetime import datetime, date, timedelta
 from DBModule import User, Habit, Streak, get_db, close_db, create_tables, hash_password
+from ArchiveModule import archive_cutoff
+from QueryModule import SQL
+
+
+# Read replica used for the analysis queries, see use_replicas
+_replicas = None
+_max_replica_lag = None
+
+
+def use_replicas(manager, max_lag: float = None):
+    """Routes the read-only analysis queries to the freshest replica of a ReplicaManager.
+
+    If max_lag is given, queries fall back to the primary while the freshest
+    replica is older than max_lag seconds. Pass None to read from the primary again.
+    """
+    global _replicas, _max_replica_lag
+    _replicas = manager
+    _max_replica_lag = max_lag
+
+
+@contextlib.contextmanager
+def read_connection(db):
+    """Yields a replica connection for read-only queries, or db if no usable replica exists."""
+    lag = _replicas.lag() if _replicas is not None else None
+    if lag is None or (_max_replica_lag is not None and lag > _max_replica_lag):
+        yield db
+    else:
+        with _replicas.reader() as replica_db:
+            yield replica_db
+
+
+# Habit lists longer than this offer a keyword search in the dashboard
+SEARCH_THRESHOLD = 20
+SEARCH_PAGE_SIZE = 20
+
+# Archive of old completion history, see use_archive
+_archive = None
+
+
+def use_archive(archive):
+    """Lets completion_history read archived years from an ArchiveModule.Archive (None to disable)."""
+    global _archive
+    _archive = archive
+
+
+# Analysis helpers used by the dashboard
+def all_habits(db, user):
+    """Returns all habits of the user."""
+    with read_connection(db) as rdb:
+        return user.list_habits(rdb)
+
+
+def habits_with_periodicity(db, user, periodicity: str):
+    """Returns all habits of the user with the given periodicity (Daily, Weekly, Monthly)."""
+    return [habit for habit in all_habits(db, user) if habit.habit_type == periodicity]
+
+
+def longest_streaks(db, user):
+    """Returns (habit, streak) pairs for all habits of the user."""
+    with read_connection(db) as rdb:
+        return [(habit, Streak.get_streak(rdb, user.user_id, habit.habit_id)) for habit in user.list_habits(rdb)]
+
+
+def longest_streak_for_habit(db, user, habit):
+    """Returns the streak record of a single habit."""
+    with read_connection(db) as rdb:
+        return Streak.get_streak(rdb, user.user_id, habit.habit_id)
+
+
+def search_habits(db, user, keywords: str, page: int = 1):
+    """Returns one page of the user's habits matching the keywords."""
+    with read_connection(db) as rdb:
+        return Habit.search(rdb, user, keywords, page, SEARCH_PAGE_SIZE)
+
+
+def completion_history(db, user, habit, start: date = None, end: date = None):
+    """Returns the completion dates of a habit between start and end (inclusive).
+
+    Recent completions come from the completions table. The archive is only
+    read when the range starts before the archive cutoff.
+    """
+    with read_connection(db) as rdb:
+        dates = habit.list_completions(rdb, user.user_id, start, end)
+        cutoff = archive_cutoff(rdb)
+    if _archive is not None and cutoff is not None and (start is None or start < cutoff):
+        archive_end = cutoff - timedelta(days=1) if end is None else min(end, cutoff - timedelta(days=1))
+        dates = _archive.read(habit.habit_id, start, archive_end) + dates
+    return dates
+
+
+def completion_count(db, user, habit) -> int:
+    """Returns the total number of completions of a habit, including archived ones, without reading the archive."""
+    with read_connection(db) as rdb:
+        hot = rdb.execute(SQL["count_completions"], (user.user_id, habit.habit_id)).fetchone()[0]
+        archived = 0
+        if archive_cutoff(rdb) is not None:
+            row = rdb.execute(SQL["archived_count"], (habit.habit_id,)).fetchone()
+            archived = row[0] if row else 0
+    return hot + archived
+
 
 def user_dashboard(db, user):
     """
@@ -66,6 +167,15 @@ def user_dashboard(db, user):
                 print("You haven't created any habits yet.")
                 continue
 
+            # Long lists can be narrowed down with a keyword search
+            if len(habits) > SEARCH_THRESHOLD:
+                keywords = input("Enter keywords to search your habits (leave empty to list all): ").strip()
+                if keywords:
+                    habits = Habit.search(db, user, keywords, per_page=SEARCH_PAGE_SIZE)
+                    if not habits:
+                        print(f"No habits found for '{keywords}'.")
+                        continue
+
             # Display available habits
             print("Your habits:")
             for i, habit in enumerate(habits, start=1):
@@ -96,12 +206,13 @@ def user_dashboard(db, user):
             print("2. Show me all my habits with the same periodicity. (Daily, Weekly, Monthly)")
             print("3. Show me the longest streak for all of my habits.")
             print("4. Show me the longest streak for a specific habit!")
+            print("5. Search my habits by keyword.")
 
             try:
                 choice_action = int(input("Please choose an action: ").strip())
 
                 if choice_action == 1:
-                    habits = user.list_habits(db)
+                    habits = all_habits(db, user)
                     if not habits:
                         print("You haven't created any habits yet.")
                     else:
@@ -116,7 +227,7 @@ def user_dashboard(db, user):
                     if periodicity not in valid_periods:
                         print("Invalid periodicity. Please choose from Daily, Weekly, Monthly")
                     else:
-                        habits = [habit for habit in user.list_habits(db) if habit.habit_type == periodicity]
+                        habits = habits_with_periodicity(db, user, periodicity)
 
                         if not habits:
                             print(f"No habits found for periodicity: {periodicity}.")
@@ -126,17 +237,16 @@ def user_dashboard(db, user):
                                 print(f"{i}. {habit.habit_name}")
 
                 elif choice_action == 3:
-                    habits = user.list_habits(db)
-                    if not habits:
+                    streaks = longest_streaks(db, user)
+                    if not streaks:
                         print("You haven't created any habits yet.")
                     else:
                         print("Longest streaks for all your habits:")
-                        for habit in habits:
-                            streak = Streak.get_streak(db, user.user_id, habit.habit_id)
+                        for habit, streak in streaks:
                             print(f"Habit: {habit.habit_name}, Longest Streak: {streak.longest_streak}")
 
                 elif choice_action == 4:
-                    habits = user.list_habits(db)
+                    habits = all_habits(db, user)
                     if not habits:
                         print("You haven't created any habits yet.")
                     else:
@@ -148,13 +258,28 @@ def user_dashboard(db, user):
                             selected_habit_index = int(input("Select the habit number to view the longest streak: ").strip())
                             if 1 <= selected_habit_index <= len(habits):
                                 selected_habit = habits[selected_habit_index - 1]
-                                streak = Streak.get_streak(db, user.user_id, selected_habit.habit_id)
+                                streak = longest_streak_for_habit(db, user, selected_habit)
                                 print(f"Habit: {selected_habit.habit_name}, Longest Streak: {streak.longest_streak}")
                             else:
                                 print("Invalid habit number.")
                         except ValueError:
                             print("Please enter a valid number.")
 
+                elif choice_action == 5:
+                    keywords = input("Enter keywords: ").strip()
+                    page = 1
+                    while True:
+                        habits = search_habits(db, user, keywords, page)
+                        if not habits:
+                            print("No (more) habits found." if page > 1 else f"No habits found for '{keywords}'.")
+                            break
+                        print(f"Results for '{keywords}' (page {page}):")
+                        for i, habit in enumerate(habits, start=(page - 1) * SEARCH_PAGE_SIZE + 1):
+                            print(f"{i}. {habit.habit_name} ({habit.habit_type}) - {habit.habit_description}")
+                        if len(habits) < SEARCH_PAGE_SIZE or input("Show next page? (yes/no): ").strip().lower() != "yes":
+                            break
+                        page += 1
+
                 else:
                     print("Invalid choice. Please select a valid option.")
 
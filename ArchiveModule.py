@@ -0,0 +1,221 @@
+# Archive Module - Moves old completion history into per-year archive files
+import mmap
+import os
+import struct
+from datetime import date
+from QueryModule import SQL
+
+
+# Archive files are "completions-<year>.bin": an 8 byte magic followed by
+# fixed-width records (habit_id, user_id, day ordinal) sorted by habit_id and day.
+MAGIC = b"HTARCH01"
+RECORD = struct.Struct("<qqi")
+
+
+def create_archive_tables(db):
+    """Create the tables holding archive counters and state in the hot database."""
+    cur = db.cursor()
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS completion_archive (
+            habit_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            archived_count INTEGER NOT NULL DEFAULT 0,
+            first_completed DATE,
+            last_archived DATE,
+            FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY(habit_id) REFERENCES habits(habit_id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_completion_archive_user_id ON completion_archive(user_id)")
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS archive_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    db.commit()
+    cur.close()
+
+
+def archive_cutoff(db):
+    """Returns the date before which completions live in the archive, or None."""
+    try:
+        row = db.execute(SQL["archive_cutoff"]).fetchone()
+    except Exception:
+        return None  # archive tables not created
+    return date.fromisoformat(row[0]) if row else None
+
+
+class ArchiveFile:
+    """Read-only, memory-mapped view of one archive year."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._mmap is None or self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a completion archive")
+        self.count = (size - len(MAGIC)) // RECORD.size
+
+    def _record(self, index: int):
+        return RECORD.unpack_from(self._mmap, len(MAGIC) + index * RECORD.size)
+
+    def _lower_bound(self, key) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            habit_id, _, ordinal = self._record(mid)
+            if (habit_id, ordinal) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read(self, habit_id: int, start: int = None, end: int = None):
+        """Returns (user_id, day ordinal) pairs of a habit between two ordinals (inclusive)."""
+        index = self._lower_bound((habit_id, start if start is not None else -1))
+        result = []
+        while index < self.count:
+            record_habit, user_id, ordinal = self._record(index)
+            if record_habit != habit_id or (end is not None and ordinal > end):
+                break
+            result.append((user_id, ordinal))
+            index += 1
+        return result
+
+    def records(self):
+        for index in range(self.count):
+            yield self._record(index)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class Archive:
+    """Directory of per-year completion archives.
+
+    archive() moves completions older than a cutoff out of the hot
+    completions table. Archive files are written first and atomically
+    replaced, then the rows are deleted and the per-habit counters in
+    completion_archive updated in one transaction, so an interrupted run
+    only leaves rows that the next run merges again without duplicates.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {}
+
+    def path(self, year: int) -> str:
+        return os.path.join(self.directory, f"completions-{year}.bin")
+
+    def years(self):
+        years = []
+        for name in os.listdir(self.directory):
+            if name.startswith("completions-") and name.endswith(".bin"):
+                years.append(int(name[len("completions-"):-len(".bin")]))
+        return sorted(years)
+
+    def _open(self, year: int):
+        archive_file = self._files.get(year)
+        if archive_file is None and os.path.exists(self.path(year)):
+            archive_file = self._files[year] = ArchiveFile(self.path(year))
+        return archive_file
+
+    def _write_year(self, year: int, records):
+        """Merges records into a year file, replacing it atomically."""
+        existing = self._open(year)
+        merged = set(records)
+        if existing is not None:
+            merged.update(existing.records())
+            existing.close()
+            del self._files[year]
+        tmp_path = self.path(year) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            for habit_id, user_id, ordinal in sorted(merged, key=lambda r: (r[0], r[2])):
+                f.write(RECORD.pack(habit_id, user_id, ordinal))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path(year))
+
+    # Moves old completions into the archive
+    def archive(self, db, cutoff: date) -> int:
+        """Archives all completions before cutoff and returns the number of rows moved."""
+        create_archive_tables(db)
+        rows = db.execute("SELECT habit_id, user_id, completed_on FROM completions WHERE completed_on < ?",
+                          (cutoff.isoformat(),)).fetchall()
+        by_year = {}
+        for habit_id, user_id, completed_on in rows:
+            day = date.fromisoformat(completed_on)
+            by_year.setdefault(day.year, []).append((habit_id, user_id, day.toordinal()))
+        for year, records in by_year.items():
+            self._write_year(year, records)
+
+        counters = {}
+        for habit_id, _, completed_on in rows:
+            count, first, last = counters.get(habit_id, (0, completed_on, completed_on))
+            counters[habit_id] = (count + 1, min(first, completed_on), max(last, completed_on))
+        cur = db.cursor()
+        try:
+            cur.execute("DELETE FROM completions WHERE completed_on < ?", (cutoff.isoformat(),))
+            for habit_id, (count, first, last) in counters.items():
+                cur.execute('''
+                    INSERT INTO completion_archive (habit_id, user_id, archived_count, first_completed, last_archived)
+                    SELECT habit_id, user_id, ?, ?, ? FROM habits WHERE habit_id = ?
+                    ON CONFLICT(habit_id) DO UPDATE SET
+                        archived_count = archived_count + excluded.archived_count,
+                        first_completed = MIN(first_completed, excluded.first_completed),
+                        last_archived = MAX(last_archived, excluded.last_archived)
+                ''', (count, first, last, habit_id))
+            previous = archive_cutoff(db)
+            if previous is None or cutoff > previous:
+                cur.execute("INSERT OR REPLACE INTO archive_state (key, value) VALUES ('cutoff', ?)",
+                            (cutoff.isoformat(),))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cur.close()
+        return len(rows)
+
+    # Reads archived completions of a habit
+    def read(self, habit_id: int, start: date = None, end: date = None):
+        """Returns archived completion dates of a habit between start and end (inclusive)."""
+        first_year = start.year if start else None
+        last_year = end.year if end else None
+        result = []
+        for year in self.years():
+            if (first_year and year < first_year) or (last_year and year > last_year):
+                continue
+            archive_file = self._open(year)
+            start_ord = start.toordinal() if start else None
+            end_ord = end.toordinal() if end else None
+            result.extend(date.fromordinal(o) for _, o in archive_file.read(habit_id, start_ord, end_ord))
+        return result
+
+    def compact(self, db) -> int:
+        """Rewrites the archive files without records of users that no longer exist."""
+        live = {row[0] for row in db.execute("SELECT user_id FROM users WHERE deleted_at IS NULL")}
+        removed = 0
+        for year in self.years():
+            archive_file = self._open(year)
+            records = list(archive_file.records())
+            kept = [r for r in records if r[1] in live]
+            if len(kept) != len(records):
+                archive_file.close()
+                del self._files[year]
+                if os.path.exists(self.path(year)):
+                    os.remove(self.path(year))
+                self._write_year(year, kept)
+                removed += len(records) - len(kept)
+        return removed
+
+    def close(self):
+        for archive_file in self._files.values():
+            archive_file.close()
+        self._files.clear()
@@ -1,33 +1,78 @@
 # Import necessary libraries
+import asyncio
+import re
 import sqlite3
+import weakref
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta  # Make sure to import this!
 sqlite3.register_adapter(datetime, lambda d: d.isoformat())  
 sqlite3.register_converter("datetime", lambda s: datetime.fromisoformat(s.decode()))
 from typing import List
 from typing import Tuple
-import hashlib # Imported to hash password
-
-
-# Utility Functions
-def hash_password(password: str) -> str:
-    """Hashes a password using SHA-256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+from PasswordModule import (hash_password, verify_password, needs_rehash, verification_cache,
+                            verify_password_async, hash_password_async)
+import MetricsModule
+from MetricsModule import instrument
+from QueryModule import SQL, cache_size
 
 
 # Database Connection, saves data to new_test.db
-def get_db(name="db.db",  uri=False):
-    db = sqlite3.connect(name)
+@instrument("get_db")
+def get_db(name="db.db",  uri=False, factory=sqlite3.Connection):
+    # The statement cache holds every registered statement, see QueryModule
+    db = sqlite3.connect(name, uri=uri, cached_statements=cache_size(), factory=factory)
+    if MetricsModule.is_enabled():
+        MetricsModule.attach(db)  # Count SQL statements per operation
     db.execute("PRAGMA foreign_keys = ON;")  # Enable foreign key support
     return db
 
 
 # Closes Database
 def close_db(db):
-    """Closes the database connection."""
+    """Closes the database connection, after committing queued write-behind completions."""
+    if _write_behind is not None:
+        _write_behind.flush()
     db.close()
 
+
+# Optional WriteBehindModule.CompletionWriter, see use_write_behind
+_write_behind = None
+
+
+def use_write_behind(writer):
+    """Routes Habit.complete through a started CompletionWriter (None to write synchronously again).
+
+    Completions are then committed in groups by the writer thread, while
+    Streak.get_streak already returns the updated streak from memory.
+    """
+    global _write_behind
+    _write_behind = writer
+
   
+# Callbacks notified with a user_id when the account is deleted or its password changes
+_user_change_listeners = []
+
+
+def add_user_change_listener(callback):
+    """Registers a callback for user deletions and password changes (held weakly for bound methods)."""
+    if hasattr(callback, "__self__"):
+        _user_change_listeners.append(weakref.WeakMethod(callback))
+    else:
+        _user_change_listeners.append(lambda: callback)
+
+
+def _notify_user_changed(user_id: int):
+    for ref in list(_user_change_listeners):
+        callback = ref()
+        if callback is None:
+            _user_change_listeners.remove(ref)
+        else:
+            try:
+                callback(user_id)
+            except Exception as e:
+                print(f"Error notifying user change: {e}")
+
+
 # User Management
 class User:
     """Initializes the User class."""
@@ -44,10 +89,7 @@ class User:
         """Adds a new user to the database."""
         cur = db.cursor()  # Cursor initialisieren
         try:
-            cur.execute('''
-                INSERT INTO users (username, password, emailID)
-                VALUES (?, ?, ?)
-            ''', (username, password, emailID))
+            cur.execute(SQL["insert_user"], (username, password, emailID))
             db.commit()
             user_id = cur.lastrowid  # creates a user_id
             print(f"User '{username}' successfully added.")
@@ -65,7 +107,7 @@ class User:
         """Find a user by username."""
         cur = db.cursor()
         try:
-            row = cur.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+            row = cur.execute(SQL["find_user"], (username,)).fetchone()
             if not row:
                 return None
             (user_id, username, password, emailID) = row
@@ -76,22 +118,85 @@ class User:
         finally:
             cur.close()
  
+    # Finds a user by id
+    @staticmethod
+    def find_user_by_id(db, user_id: int):
+        """Find a user by user_id."""
+        cur = db.cursor()
+        try:
+            row = cur.execute(SQL["find_user_by_id"], (user_id,)).fetchone()
+            if not row:
+                return None
+            (user_id, username, password, emailID) = row
+            return User(user_id, username, password, emailID)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+        finally:
+            cur.close()
+
     # Identefies a user
     @staticmethod
     def username_exists(db, username):
         """Check if a username already exists in the database."""
         cur = db.cursor()
-        cur.execute("SELECT 1 FROM users WHERE username = ?", (username,))
+        cur.execute(SQL["username_exists"], (username,))
         return cur.fetchone() is not None
  
  
     # Tries to login a user
     @classmethod
     def try_login(cls, db, username: str, password: str):
+        """Verifies the plain password and upgrades outdated hashes on success."""
+        user = cls.find_user(db, username)
+        if not user:
+            return None
+        if verification_cache.check(username, user.password, password):
+            return user
+        if not verify_password(password, user.password):
+            return None
+        if needs_rehash(user.password):
+            user.update_password(db, hash_password(password))
+        verification_cache.add(username, user.password, password)
+        return user
+
+
+    # Tries to login a user without blocking the event loop
+    @classmethod
+    async def try_login_async(cls, db, username: str, password: str):
+        """Like try_login, but runs the password hashing in the password thread pool.
+
+        The database is only used from the calling thread, so the connection
+        does not need to be shared with the pool.
+        """
         user = cls.find_user(db, username)
-        if not user or user.password != password:
+        if not user:
+            return None
+        if verification_cache.check(username, user.password, password):
+            return user
+        if not await asyncio.wrap_future(verify_password_async(password, user.password)):
             return None
+        if needs_rehash(user.password):
+            user.update_password(db, await asyncio.wrap_future(hash_password_async(password)))
+        verification_cache.add(username, user.password, password)
         return user
+
+
+    # Replaces the stored password hash
+    def update_password(self, db, hashed_password: str):
+        """Stores a new password hash for the user."""
+        cur = db.cursor()
+        try:
+            cur.execute(SQL["update_password"], (hashed_password, self.user_id))
+            db.commit()
+            self.password = hashed_password
+            _notify_user_changed(self.user_id)
+            return True
+        except Exception as e:
+            print(f"Error: {e}")
+            return False
+        finally:
+            cur.close()
         
         
     # deletes a user
@@ -104,14 +209,19 @@ class User:
     # deletes user and userdata 
     @staticmethod
     def delete_user_by_name(db, username):
+        """Soft-deletes a user; the rows are removed later by PurgeModule.
+
+        The account gets a deleted_at tombstone and its username is renamed
+        so it can be registered again right away. All reads ignore
+        tombstoned users, so this is a single-row update.
+        """
         cur = db.cursor()
         try:
-            cur.execute('''
-                DELETE FROM users
-                WHERE username = ?
-            ''', (username,))
+            row = cur.execute(SQL["live_user_id"], (username,)).fetchone()
+            cur.execute(SQL["tombstone_user"], (datetime.now().isoformat(), username))
             db.commit()
             if cur.rowcount > 0:
+                _notify_user_changed(row[0])
                 print(f"Account for '{username}' has been deleted successfully.")
                 return True
             else:
@@ -141,9 +251,11 @@ def create_tables(db):
             user_id INTEGER PRIMARY KEY AUTOINCREMENT, 
             username TEXT NOT NULL UNIQUE,
             password TEXT NOT NULL,
-            emailID TEXT NOT NULL
+            emailID TEXT NOT NULL,
+            deleted_at TEXT
         )
     ''')
+    _add_column_if_missing(cur, "users", "deleted_at", "TEXT")
     
     # Create the habits table
     cur.execute('''
@@ -169,9 +281,86 @@ def create_tables(db):
             FOREIGN KEY(habit_id) REFERENCES habits(habit_id) ON DELETE CASCADE
         )
     ''')
+
+    # Create the completions table, one row per counted completion
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS completions (
+            user_id INTEGER NOT NULL,
+            habit_id INTEGER NOT NULL,
+            completed_on DATE NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY(habit_id) REFERENCES habits(habit_id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Indexes on the foreign key columns, so cascades and per-user reads do not scan
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_habits_user_id ON habits(user_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_streaks_user_habit ON streaks(user_id, habit_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_streaks_habit_id ON streaks(habit_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_completions_habit_date ON completions(habit_id, completed_on)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_completions_user_id ON completions(user_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_completions_completed_on ON completions(completed_on)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_users_deleted_at ON users(deleted_at) WHERE deleted_at IS NOT NULL")
+
+    _create_habit_search(cur)
     
     db.commit()
 
+
+# Creates the full-text index over habit names and descriptions
+def _create_habit_search(cur):
+    """Creates the habits_fts table and the triggers keeping it in sync with habits.
+
+    Builds without FTS5 skip this, and Habit.search falls back to LIKE.
+    """
+    exists = cur.execute(SQL["habit_search_exists"]).fetchone()
+    # The owner column holds a "u<user_id>" token, so searches within one user
+    # intersect with that user's short posting list instead of filtering all matches
+    cur.execute('''
+        CREATE VIEW IF NOT EXISTS habits_search AS
+        SELECT habit_id, habit_name, habit_description, 'u' || user_id AS owner FROM habits
+    ''')
+    try:
+        cur.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS habits_fts USING fts5(
+                habit_name, habit_description, owner,
+                content='habits_search', content_rowid='habit_id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS habits_fts_insert AFTER INSERT ON habits BEGIN
+            INSERT INTO habits_fts(rowid, habit_name, habit_description, owner)
+            VALUES (new.habit_id, new.habit_name, new.habit_description, 'u' || new.user_id);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS habits_fts_delete AFTER DELETE ON habits BEGIN
+            INSERT INTO habits_fts(habits_fts, rowid, habit_name, habit_description, owner)
+            VALUES ('delete', old.habit_id, old.habit_name, old.habit_description, 'u' || old.user_id);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS habits_fts_update
+        AFTER UPDATE OF habit_name, habit_description, user_id ON habits BEGIN
+            INSERT INTO habits_fts(habits_fts, rowid, habit_name, habit_description, owner)
+            VALUES ('delete', old.habit_id, old.habit_name, old.habit_description, 'u' || old.user_id);
+            INSERT INTO habits_fts(rowid, habit_name, habit_description, owner)
+            VALUES (new.habit_id, new.habit_name, new.habit_description, 'u' || new.user_id);
+        END
+    ''')
+    if not exists:
+        cur.execute("INSERT INTO habits_fts(habits_fts) VALUES ('rebuild')")  # Index habits created before
+
+
+# Adds a column to tables created by older versions
+def _add_column_if_missing(cur, table: str, column: str, definition: str):
+    columns = [row[1] for row in cur.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
    
 
 
@@ -192,33 +381,27 @@ class Habit:
         cur = db.cursor()
         try:
             # checks if user exists
-            cur.execute("SELECT username FROM users WHERE user_id = ?", (user_id,))
+            cur.execute(SQL["live_user_exists"], (user_id,))
             if not cur.fetchone():
                 print(f"Error: User with ID {user_id} does not exist.")
                 return None
     
             # checks if habit exists
-            cur.execute("SELECT 1 FROM habits WHERE user_id = ? AND habit_name = ?", (user_id, habit_name))
+            cur.execute(SQL["habit_exists"], (user_id, habit_name))
             if cur.fetchone():
                 print(f"Error: Habit '{habit_name}' already exists for user ID {user_id}.")
                 return None
     
             # adds habit to habit table
-            cur.execute('''
-                INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, habit_name, habit_description, start_date, habit_type))
+            cur.execute(SQL["insert_habit"], (user_id, habit_name, habit_description, start_date, habit_type))
             db.commit()
             habit_id = cur.lastrowid
             
             # checks if streak exists
-            cur.execute("SELECT 1 FROM streaks WHERE user_id = ? AND habit_id = ?", (user_id, habit_id))
+            cur.execute(SQL["streak_exists"], (user_id, habit_id))
             # adds streak to the streak table
             if not cur.fetchone():
-                cur.execute('''
-                    INSERT INTO streaks (user_id, habit_id, current_streak, longest_streak, last_completed)
-                    VALUES (?, ?, 0, 0, NULL)
-                ''', (user_id, habit_id))
+                cur.execute(SQL["insert_streak"], (user_id, habit_id))
                 db.commit()
             
             print("Good job!")
@@ -232,6 +415,7 @@ class Habit:
         
 
     # Marks a habit as completed and updates the streak
+    @instrument("Habit.complete")
     def complete(self, db, user_id: int, date_completed=None):
         """Marks the habit as completed and updates the streak."""
         if date_completed is None:
@@ -252,21 +436,84 @@ class Habit:
         streak.current_streak = new_streak
         streak.longest_streak = max(streak.longest_streak, streak.current_streak)
         streak.last_completed = date_completed  # Setze das tatsächliche Datum
+        if _write_behind is not None:
+            # Visible to get_streak at once, committed later by the writer thread
+            _write_behind.submit(user_id, self.habit_id, streak.current_streak, streak.longest_streak, date_completed)
+            return streak, True
+        # Keep the completion history; update_streak commits both writes together
+        db.execute(SQL["insert_completion"], (user_id, self.habit_id, str(date_completed)))
         streak.update_streak(db, user_id, self.habit_id)
     
         return streak, True
 
+
+    # Lists the completion dates kept in the database
+    def list_completions(self, db, user_id: int, start: date = None, end: date = None) -> List[date]:
+        """Lists the completion dates of this habit between start and end (inclusive)."""
+        # Open ends use bounds outside any date, so one statement serves every range
+        rows = db.execute(SQL["list_completions"], (user_id, self.habit_id, str(start or date.min),
+                                                    str(end or date.max))).fetchall()
+        return [date.fromisoformat(row[0]) for row in rows]
+
         
 
     # Creates a list of all habits for a user
     @classmethod
+    @instrument("Habit.list_habits_for_user")
     def list_habits_for_user(cls, db, user: User):
         """Lists all habits for a given user"""
-        raw_habits = db.execute(
-            "SELECT habit_id, habit_name, habit_description, start_date, habit_type FROM habits where user_id = ?",
-            (user.user_id,)).fetchall()
+        raw_habits = db.execute(SQL["list_habits_for_user"], (user.user_id,)).fetchall()
         return list(cls._from_raw(raw_habit) for raw_habit in raw_habits)
 
+    # Searches habits by keyword
+    @classmethod
+    def search(cls, db, user: User, query: str, page: int = 1, per_page: int = 20):
+        """Returns one page of the user's habits matching the keywords, best match first."""
+        return [habit for _, habit in cls._search(db, query, page, per_page, user.user_id)]
+
+
+    # Searches habits of all users by keyword
+    @classmethod
+    def search_all_users(cls, db, query: str, page: int = 1, per_page: int = 20):
+        """Returns one page of (user_id, habit) pairs matching the keywords across all users."""
+        return cls._search(db, query, page, per_page)
+
+
+    @classmethod
+    def _search(cls, db, query: str, page: int, per_page: int, user_id: int = None):
+        terms = re.findall(r"\w+", query)
+        if not terms or page < 1:
+            return []
+        offset = (page - 1) * per_page
+        if db.execute(SQL["habit_search_exists"]).fetchone():
+            # Every keyword must match a word prefix in the name or description;
+            # ranked with bm25, name matches weigh double
+            match = "{habit_name habit_description} : (" + " ".join('"' + term + '"*' for term in terms) + ")"
+            if user_id is not None:
+                match = f'owner : "u{int(user_id)}" AND {match}'
+            rows = db.execute(SQL["search_habits"], (match, per_page, offset)).fetchall()
+        else:
+            rows = cls._search_like(db, terms, per_page, offset, user_id)
+        return [(raw[5], cls._from_raw(raw[:5])) for raw in rows]
+
+
+    @staticmethod
+    def _search_like(db, terms, limit: int, offset: int, user_id: int = None):
+        """LIKE fallback for builds without FTS5; the only statement built at runtime."""
+        columns = "h.habit_id, h.habit_name, h.habit_description, h.start_date, h.habit_type, h.user_id"
+        live_user = "EXISTS (SELECT 1 FROM users u WHERE u.user_id = h.user_id AND u.deleted_at IS NULL)"
+        conditions = " AND ".join("(h.habit_name LIKE ? OR h.habit_description LIKE ?)" for _ in terms)
+        sql = f"SELECT {columns} FROM habits h WHERE {conditions} AND {live_user}"
+        params = []
+        for term in terms:
+            params += [f"%{term}%", f"%{term}%"]
+        if user_id is not None:
+            sql += " AND h.user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY h.habit_id LIMIT ? OFFSET ?"
+        return db.execute(sql, params + [limit, offset]).fetchall()
+
+
     # Receives a habit_type, matches the habit_type a value
     @staticmethod
     def _from_raw(raw):
@@ -299,10 +546,7 @@ class Habit:
         try:
             for habit_name, habit_description, start_date, habit_type in predefined_habits:
                 # Check if the habit already exists for the user
-                cur.execute(
-                    "SELECT 1 FROM habits WHERE user_id = ? AND habit_name = ?",
-                    (user.user_id, habit_name),
-                )
+                cur.execute(SQL["habit_exists"], (user.user_id, habit_name))
                 result = cur.fetchone()
                 
                 if result:
@@ -310,26 +554,15 @@ class Habit:
                     print(f"'{habit_name}' already exists for user '{user.username}'. Skipping...")
                 else:
                     # Add the habit to the database
-                    cur.execute(
-                        '''
-                        INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type)
-                        VALUES (?, ?, ?, ?, ?)
-                        ''',
-                        (user.user_id, habit_name, habit_description, start_date, habit_type),
-                    )
+                    cur.execute(SQL["insert_habit"],
+                                (user.user_id, habit_name, habit_description, start_date, habit_type))
                     db.commit()
                     habit_id = cur.lastrowid
                 
                 # Sicherstellen, dass ein Streak existiert
-                cur.execute("SELECT 1 FROM streaks WHERE user_id = ? AND habit_id = ?", (user.user_id, habit_id))
+                cur.execute(SQL["streak_exists"], (user.user_id, habit_id))
                 if not cur.fetchone():
-                    cur.execute(
-                        '''
-                        INSERT INTO streaks (user_id, habit_id, current_streak, longest_streak, last_completed)
-                        VALUES (?, ?, 0, 0, NULL)
-                        ''',
-                        (user.user_id, habit_id),
-                    )
+                    cur.execute(SQL["insert_streak"], (user.user_id, habit_id))
                     db.commit()
     
             print(f"Predefined habits added for user '{user.username}'.")
@@ -350,14 +583,15 @@ class Streak:
 
     # Checks if streak allready exists
     @staticmethod
+    @instrument("Streak.get_streak")
     def get_streak(db, user_id: int, habit_id: int):
         """Fetches streak data from the database."""
+        if _write_behind is not None:
+            pending = _write_behind.pending_streak(user_id, habit_id)
+            if pending is not None:
+                return Streak(*pending)
         cur = db.cursor()
-        cur.execute('''
-            SELECT current_streak, longest_streak, last_completed
-            FROM streaks
-            WHERE user_id = ? AND habit_id = ?
-        ''', (user_id, habit_id))
+        cur.execute(SQL["get_streak"], (user_id, habit_id))
         result = cur.fetchone()
         cur.close()
         if result:
@@ -366,14 +600,11 @@ class Streak:
             return Streak(0, 0, None)
 
     # Updates the streak record in the database
+    @instrument("Streak.update_streak")
     def update_streak(self, db, user_id: int, habit_id: int):
         """Updates the streak record in the database."""
         cur = db.cursor()
-        cur.execute('''
-            UPDATE streaks
-            SET current_streak = ?, longest_streak = ?, last_completed = ?
-            WHERE user_id = ? AND habit_id = ?
-        ''', (self.current_streak, self.longest_streak, self.last_completed, user_id, habit_id))
+        cur.execute(SQL["update_streak"], (self.current_streak, self.longest_streak, self.last_completed, user_id, habit_id))
         db.commit()
         print(f"Updated streak! Last Completed: {self.last_completed}")
 
@@ -1,6 +1,9 @@
 # Initializes a User CLI 
+import os
 from DBModule import User, Habit, Streak, get_db, close_db, create_tables, hash_password
 from AnalyticalModule import user_dashboard
+from PurgeModule import PurgeWorker
+from QueryModule import check_query_plans
 
 
 def cli():
@@ -24,6 +27,14 @@ def cli():
     db = get_db()
     create_tables(db)
 
+    # Debug mode: refuse to start if a hot statement would scan a whole table
+    if os.environ.get("HABIT_TRACKER_SQL_DEBUG"):
+        check_query_plans(db)
+
+    # Deleted accounts are only tombstoned, their data is removed in the background
+    purge_worker = PurgeWorker("db.db")
+    purge_worker.start()
+
     user = None  # Initialize user variable
 
     while True:
@@ -35,7 +46,7 @@ def cli():
                 # Handle user login
                 username = input("Please enter your username: ").strip()
                 password = input("Please enter your password: ").strip()
-                user = User.try_login(db, username, hash_password(password))
+                user = User.try_login(db, username, password)
 
                 if user:
                     print(f"Welcome back, {user.username}!")
@@ -73,6 +84,7 @@ def cli():
             user = None  # Log out the user after the dashboard session
 
     # Close the database connection when the application exits
+    purge_worker.stop()
     close_db(db)
 
 
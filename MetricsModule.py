@@ -0,0 +1,203 @@
+# Metrics Module - Opt-in call counts, latency histograms and SQL statement counts
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+
+
+# Upper bounds of the latency histogram buckets in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_operations = {}
+
+
+class OperationStats:
+    """Counters collected for one instrumented operation."""
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.statements = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+
+    def observe(self, seconds: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates a latency quantile as the upper bound of its bucket."""
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+            "statements": self.statements,
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.buckets)),
+        }
+
+
+def enable():
+    """Turns instrumentation on."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Turns instrumentation off; collected data is kept until reset()."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Discards all collected metrics."""
+    with _lock:
+        _operations.clear()
+
+
+def _stats(name: str) -> OperationStats:
+    """Returns the stats for an operation; the caller must hold _lock."""
+    stats = _operations.get(name)
+    if stats is None:
+        stats = _operations[name] = OperationStats(name)
+    return stats
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# Decorator recording latency and statements of an operation
+def instrument(name: str = None):
+    """Records calls, latency and SQL statements of the decorated function.
+
+    When instrumentation is disabled the wrapper only checks a flag before
+    calling the function. Nested operations are inclusive: a statement run
+    by Streak.get_streak inside Habit.complete counts for both.
+    """
+    def decorator(func):
+        op_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            stack = _stack()
+            stack.append(op_name)
+            failed = True
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                with _lock:
+                    _stats(op_name).observe(elapsed, failed)
+        return wrapper
+    return decorator
+
+
+def _trace_statement(statement: str):
+    stack = getattr(_local, "stack", None)
+    with _lock:
+        _stats("sql").statements += 1
+        if stack:
+            for op_name in set(stack):
+                _stats(op_name).statements += 1
+
+
+def attach(db):
+    """Counts the SQL statements run on a connection via its trace callback."""
+    db.set_trace_callback(_trace_statement)
+
+
+def detach(db):
+    db.set_trace_callback(None)
+
+
+def snapshot() -> dict:
+    """Returns the collected metrics as plain dicts keyed by operation."""
+    with _lock:
+        return {name: stats.as_dict() for name, stats in sorted(_operations.items())}
+
+
+# Exporters
+def report_text() -> str:
+    """Formats the metrics as a human readable table."""
+    lines = [f"{'operation':<36} {'calls':>8} {'errors':>6} {'mean ms':>9} {'p99 ms':>9} {'max ms':>9} {'sql':>8}"]
+    for name, stats in snapshot().items():
+        lines.append(f"{name:<36} {stats['calls']:>8} {stats['errors']:>6} "
+                     f"{stats['mean_seconds'] * 1000:>9.3f} {stats['p99_seconds'] * 1000:>9.3f} "
+                     f"{stats['max_seconds'] * 1000:>9.3f} {stats['statements']:>8}")
+    return "\n".join(lines) + "\n"
+
+
+def report_json() -> str:
+    """Formats the metrics as JSON."""
+    return json.dumps(snapshot(), indent=2)
+
+
+def report_prometheus() -> str:
+    """Formats the metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP habittracker_operation_seconds Latency of instrumented operations.",
+        "# TYPE habittracker_operation_seconds histogram",
+    ]
+    data = snapshot()
+    for name, stats in data.items():
+        if not stats["calls"]:
+            continue
+        cumulative = 0
+        for bound, count in stats["buckets"].items():
+            cumulative += count
+            lines.append(f'habittracker_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'habittracker_operation_seconds_sum{{operation="{name}"}} {stats["total_seconds"]}')
+        lines.append(f'habittracker_operation_seconds_count{{operation="{name}"}} {stats["calls"]}')
+    lines.append("# HELP habittracker_operation_errors_total Failed calls of instrumented operations.")
+    lines.append("# TYPE habittracker_operation_errors_total counter")
+    for name, stats in data.items():
+        if stats["calls"]:
+            lines.append(f'habittracker_operation_errors_total{{operation="{name}"}} {stats["errors"]}')
+    lines.append("# HELP habittracker_sql_statements_total SQL statements run per operation.")
+    lines.append("# TYPE habittracker_sql_statements_total counter")
+    for name, stats in data.items():
+        lines.append(f'habittracker_sql_statements_total{{operation="{name}"}} {stats["statements"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path: str, fmt: str = "text"):
+    """Writes the metrics to a local file as text, json or prometheus."""
+    exporters = {"text": report_text, "json": report_json, "prometheus": report_prometheus}
+    if fmt not in exporters:
+        raise ValueError(f"Unknown report format '{fmt}', expected one of {', '.join(exporters)}")
+    with open(path, "w") as f:
+        f.write(exporters[fmt]())
@@ -0,0 +1,182 @@
+# Password Module - Handles salted password hashing and verification
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Stored hashes look like "scrypt$<cost>$<r>$<p>$<salt hex>$<hash hex>"
+SCHEME = "scrypt"
+DEFAULT_COST = 14        # log2 of the scrypt N parameter
+BLOCK_SIZE = 8           # scrypt r parameter
+PARALLELISM = 1          # scrypt p parameter
+SALT_BYTES = 16
+KEY_BYTES = 32
+MIN_COST = 1
+MAX_COST = 20
+MAX_BLOCK_SIZE = 32
+MAX_PARALLELISM = 16
+
+_cost = DEFAULT_COST
+_executor = None
+_executor_lock = threading.Lock()
+_max_workers = 4
+
+
+# Changes the cost used for new hashes
+def set_cost(cost: int):
+    """Sets the scrypt cost (log2 of N) used by hash_password."""
+    global _cost
+    if not MIN_COST <= cost <= MAX_COST:
+        raise ValueError(f"Invalid cost {cost}, expected a value between {MIN_COST} and {MAX_COST}")
+    _cost = cost
+
+
+def get_cost() -> int:
+    """Returns the scrypt cost currently used for new hashes."""
+    return _cost
+
+
+def _scrypt(password: str, salt: bytes, cost: int, r: int, p: int) -> bytes:
+    n = 2 ** cost
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p + 2 ** 20, dklen=KEY_BYTES)
+
+
+def _legacy_hash(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+# Hashes a password with a fresh salt
+def hash_password(password: str, cost: int = None) -> str:
+    """Hashes a password using salted scrypt."""
+    if cost is None:
+        cost = _cost
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, cost, BLOCK_SIZE, PARALLELISM)
+    return f"{SCHEME}${cost}${BLOCK_SIZE}${PARALLELISM}${salt.hex()}${key.hex()}"
+
+
+def is_legacy_hash(stored: str) -> bool:
+    """Checks if a stored hash is an old unsalted SHA-256 digest."""
+    return not stored.startswith(SCHEME + "$")
+
+
+def needs_rehash(stored: str, cost: int = None) -> bool:
+    """Checks if a stored hash should be replaced after a successful login."""
+    if cost is None:
+        cost = _cost
+    if is_legacy_hash(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) != cost
+    except (IndexError, ValueError):
+        return True
+
+
+# Verifies a password against a stored hash
+def verify_password(password: str, stored: str) -> bool:
+    """Verifies a password against a scrypt or legacy SHA-256 hash."""
+    if not stored:
+        return False
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(stored, _legacy_hash(password))
+    try:
+        _, cost, r, p, salt, key = stored.split("$")
+        cost, r, p = int(cost), int(r), int(p)
+        # Reject parameters outside the supported range instead of allocating huge buffers
+        if not (MIN_COST <= cost <= MAX_COST and 1 <= r <= MAX_BLOCK_SIZE and 1 <= p <= MAX_PARALLELISM):
+            return False
+        expected = bytes.fromhex(key)
+        actual = _scrypt(password, bytes.fromhex(salt), cost, r, p)
+    except (ValueError, MemoryError, OverflowError):
+        return False
+    return hmac.compare_digest(expected, actual)
+
+
+# Thread pool for verification
+def set_max_workers(max_workers: int):
+    """Sets the size of the verification thread pool (applies to a new pool)."""
+    global _max_workers, _executor
+    with _executor_lock:
+        _max_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="password")
+        return _executor
+
+
+def verify_password_async(password: str, stored: str):
+    """Runs verify_password in the thread pool and returns a Future."""
+    return _get_executor().submit(verify_password, password, stored)
+
+
+def hash_password_async(password: str, cost: int = None):
+    """Runs hash_password in the thread pool and returns a Future."""
+    return _get_executor().submit(hash_password, password, cost)
+
+
+# Cache of recent successful verifications
+class VerificationCache:
+    """Bounded cache of successful verifications with a short TTL.
+
+    Entries are keyed by an HMAC of the username, stored hash and password
+    under a per-process secret, so no plaintext is kept in memory and a
+    password change invalidates the entry.
+    """
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, username: str, stored: str, password: str) -> bytes:
+        message = "\0".join((username, stored, password)).encode()
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    # Checks if a verification is still cached
+    def check(self, username: str, stored: str, password: str) -> bool:
+        key = self._key(username, stored, password)
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is not None and expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if expires is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    # Stores a successful verification
+    def add(self, username: str, stored: str, password: str):
+        key = self._key(username, stored, password)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+verification_cache = VerificationCache()
@@ -0,0 +1,193 @@
+# Purge Module - Removes soft-deleted accounts in bounded chunks
+import sqlite3
+import threading
+import time
+
+
+# Tables holding per-user rows, purged in this order before the users row.
+# Each entry is (table, user_id column); tables that do not exist are skipped.
+CHILD_TABLES = [
+    ("sessions", "user_id"),
+    ("completions", "user_id"),
+    ("completion_archive", "user_id"),
+    ("streaks", "user_id"),
+    ("habits", "user_id"),
+]
+
+
+class PurgeStats:
+    """Totals of one or more purge passes."""
+    def __init__(self):
+        self.users = 0
+        self.rows = 0
+        self.chunks = 0
+        self.interrupted = 0
+        self.seconds = 0.0
+        self.max_lock_seconds = 0.0
+
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "users": self.users,
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "interrupted": self.interrupted,
+            "seconds": self.seconds,
+            "rows_per_second": self.rows_per_second(),
+            "max_lock_seconds": self.max_lock_seconds,
+        }
+
+
+def _existing_tables(db):
+    names = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [(table, column) for table, column in CHILD_TABLES if table in names]
+
+
+class Purger:
+    """Deletes tombstoned users and their rows in small write transactions.
+
+    Every chunk is its own transaction. A progress handler interrupts any
+    statement that runs longer than time_slice seconds; the chunk is then
+    rolled back and retried at half the size, so the write lock is never
+    held much longer than the slice. Chunks that finish well inside the
+    slice grow the chunk size again.
+    """
+    def __init__(self, db, chunk_size: int = 500, time_slice: float = 0.05, min_chunk_size: int = 1,
+                 max_chunk_size: int = 20000, progress_steps: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.progress_steps = progress_steps  # VM instructions between time slice checks
+        self.time_slice = time_slice
+        self.min_chunk_size = min_chunk_size
+        self.stats = PurgeStats()
+        self._deadline = None
+
+    def _progress(self):
+        return 1 if self._deadline is not None and time.perf_counter() > self._deadline else 0
+
+    def _run_chunk(self, sql: str, params) -> int:
+        """Runs one delete in its own transaction and returns the deleted row count, or None if interrupted."""
+        start = time.perf_counter()
+        self._deadline = start + self.time_slice
+        self.db.set_progress_handler(self._progress, self.progress_steps)
+        try:
+            cur = self.db.execute(sql, params)
+            self.db.commit()
+            return cur.rowcount
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            self.db.rollback()
+            return None
+        finally:
+            self.db.set_progress_handler(None, 0)
+            self._deadline = None
+            elapsed = time.perf_counter() - start
+            self.stats.max_lock_seconds = max(self.stats.max_lock_seconds, elapsed)
+
+    def _delete_in_chunks(self, table: str, column: str, user_ids) -> int:
+        placeholders = ", ".join("?" * len(user_ids))
+        deleted = 0
+        while True:
+            sql = (f"DELETE FROM {table} WHERE rowid IN "
+                   f"(SELECT rowid FROM {table} WHERE {column} IN ({placeholders}) LIMIT ?)")
+            start = time.perf_counter()
+            count = self._run_chunk(sql, (*user_ids, self.chunk_size))
+            if count is None:
+                self.stats.interrupted += 1
+                if self.chunk_size <= self.min_chunk_size:
+                    raise RuntimeError(f"Cannot delete {self.min_chunk_size} row(s) of {table} within the time slice")
+                self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
+                continue
+            self.stats.chunks += 1
+            deleted += count
+            if time.perf_counter() - start < self.time_slice / 4:
+                self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+            if count == 0:
+                return deleted
+
+    # Runs one purge pass
+    def purge(self, max_users: int = None, deadline: float = None, stop: threading.Event = None) -> PurgeStats:
+        """Purges tombstoned users until none are left, max_users is reached, the deadline passes or stop is set."""
+        start = time.perf_counter()
+        tables = _existing_tables(self.db)
+        purged = 0
+        try:
+            while max_users is None or purged < max_users:
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+                if stop is not None and stop.is_set():
+                    break
+                batch = min(self.chunk_size, 100)
+                if max_users is not None:
+                    batch = min(batch, max_users - purged)
+                user_ids = [row[0] for row in self.db.execute(
+                    "SELECT user_id FROM users WHERE deleted_at IS NOT NULL LIMIT ?", (batch,))]
+                if not user_ids:
+                    break
+                for table, column in tables:
+                    self.stats.rows += self._delete_in_chunks(table, column, user_ids)
+                self.stats.rows += self._delete_in_chunks("users", "user_id", user_ids)
+                purged += len(user_ids)
+                self.stats.users += len(user_ids)
+        finally:
+            self.stats.seconds += time.perf_counter() - start
+        return self.stats
+
+
+# Purges all tombstoned users on a connection
+def purge_deleted_users(db, chunk_size: int = 500, time_slice: float = 0.05) -> dict:
+    """Removes every soft-deleted user and their rows, returning throughput stats."""
+    return Purger(db, chunk_size, time_slice).purge().as_dict()
+
+
+class PurgeWorker:
+    """Background thread that purges tombstoned users with its own connection."""
+    def __init__(self, path: str, interval: float = 5.0, chunk_size: int = 500, time_slice: float = 0.05):
+        self.path = path
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.time_slice = time_slice
+        self.stats = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the worker thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="purge-worker", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Asks the worker to run a pass now instead of waiting for the interval."""
+        self._wake.set()
+
+    def _run(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA foreign_keys = ON;")
+        purger = Purger(db, self.chunk_size, self.time_slice)
+        self.stats = purger.stats
+        try:
+            while not self._stop.is_set():
+                try:
+                    purger.purge(stop=self._stop)
+                except Exception as e:
+                    print(f"Error purging deleted users: {e}")
+                self._wake.wait(self.interval)
+                self._wake.clear()
+        finally:
+            db.close()
+
+    def stop(self):
+        """Stops the worker after the current batch of users."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
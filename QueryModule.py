@@ -0,0 +1,178 @@
+# Query Module - Central registry of the SQL statements used by DBModule and AnalyticalModule
+import collections
+import sqlite3
+
+
+# Every statement is registered once under a name. The text is normalized
+# (whitespace collapsed), so each call site passes the exact same string and
+# sqlite3's per-connection statement cache, keyed by the SQL text, reuses the
+# prepared statement instead of parsing it again.
+SQL = {}
+
+# Statements on the login, dashboard and completion paths; their query plans
+# must not scan a whole table (see check_query_plans)
+HOT_QUERIES = set()
+
+
+class QueryPlanError(Exception):
+    """Raised by check_query_plans when a hot statement scans a whole table."""
+
+
+def register(name: str, sql: str, hot: bool = False) -> str:
+    """Adds a statement to the registry and returns its normalized text."""
+    text = " ".join(sql.split())
+    if SQL.get(name, text) != text:
+        raise ValueError(f"Statement '{name}' is already registered with different SQL")
+    SQL[name] = text
+    if hot:
+        HOT_QUERIES.add(name)
+    return text
+
+
+# Users
+register("insert_user", "INSERT INTO users (username, password, emailID) VALUES (?, ?, ?)")
+register("find_user", """
+    SELECT user_id, username, password, emailID FROM users WHERE username = ? AND deleted_at IS NULL
+""", hot=True)
+register("find_user_by_id", """
+    SELECT user_id, username, password, emailID FROM users WHERE user_id = ? AND deleted_at IS NULL
+""", hot=True)
+register("username_exists", "SELECT 1 FROM users WHERE username = ?", hot=True)
+register("live_user_exists", "SELECT username FROM users WHERE user_id = ? AND deleted_at IS NULL", hot=True)
+register("update_password", "UPDATE users SET password = ? WHERE user_id = ?")
+register("live_user_id", "SELECT user_id FROM users WHERE username = ? AND deleted_at IS NULL")
+register("tombstone_user", """
+    UPDATE users SET deleted_at = ?, username = username || '#deleted#' || user_id
+    WHERE username = ? AND deleted_at IS NULL
+""")
+
+# Habits
+register("habit_exists", "SELECT 1 FROM habits WHERE user_id = ? AND habit_name = ?", hot=True)
+register("insert_habit", """
+    INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type) VALUES (?, ?, ?, ?, ?)
+""")
+register("list_habits_for_user", """
+    SELECT habit_id, habit_name, habit_description, start_date, habit_type FROM habits WHERE user_id = ?
+    AND EXISTS (SELECT 1 FROM users WHERE users.user_id = habits.user_id AND deleted_at IS NULL)
+""", hot=True)
+register("habit_search_exists", "SELECT 1 FROM sqlite_master WHERE name = 'habits_fts'")
+register("search_habits", """
+    SELECT h.habit_id, h.habit_name, h.habit_description, h.start_date, h.habit_type, h.user_id
+    FROM habits_fts JOIN habits h ON h.habit_id = habits_fts.rowid
+    WHERE habits_fts MATCH ?
+    AND EXISTS (SELECT 1 FROM users u WHERE u.user_id = h.user_id AND u.deleted_at IS NULL)
+    ORDER BY bm25(habits_fts, 2.0, 1.0, 0.0), h.habit_id LIMIT ? OFFSET ?
+""", hot=True)
+
+# Streaks
+register("streak_exists", "SELECT 1 FROM streaks WHERE user_id = ? AND habit_id = ?", hot=True)
+register("insert_streak", """
+    INSERT INTO streaks (user_id, habit_id, current_streak, longest_streak, last_completed) VALUES (?, ?, 0, 0, NULL)
+""")
+register("get_streak", """
+    SELECT current_streak, longest_streak, last_completed FROM streaks WHERE user_id = ? AND habit_id = ?
+""", hot=True)
+register("update_streak", """
+    UPDATE streaks SET current_streak = ?, longest_streak = ?, last_completed = ? WHERE user_id = ? AND habit_id = ?
+""", hot=True)
+
+# Completions
+register("insert_completion", "INSERT INTO completions (user_id, habit_id, completed_on) VALUES (?, ?, ?)", hot=True)
+register("list_completions", """
+    SELECT completed_on FROM completions
+    WHERE user_id = ? AND habit_id = ? AND completed_on >= ? AND completed_on <= ? ORDER BY completed_on
+""", hot=True)
+register("count_completions", "SELECT COUNT(*) FROM completions WHERE user_id = ? AND habit_id = ?", hot=True)
+register("archive_cutoff", "SELECT value FROM archive_state WHERE key = 'cutoff'")
+register("archived_count", "SELECT archived_count FROM completion_archive WHERE habit_id = ?", hot=True)
+
+
+# Room for statements built at runtime (the LIKE search fallback) and those of
+# the other modules sharing a connection, so registered statements are never evicted
+SPARE_STATEMENTS = 64
+
+
+def cache_size() -> int:
+    """Returns the statement cache size get_db configures for its connections."""
+    return len(SQL) + SPARE_STATEMENTS
+
+
+def _full_scans(plan):
+    """Returns the plan lines that scan a whole table (virtual tables such as FTS5 excluded)."""
+    return [detail for detail in plan
+            if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail
+            and not detail.startswith("SCAN CONSTANT ROW")]
+
+
+def check_query_plans(db, names=None):
+    """Runs EXPLAIN QUERY PLAN for the registered statements and raises QueryPlanError on full scans.
+
+    Checks the hot statements by default. Statements on tables that do not
+    exist in this database (e.g. before the first archive run) are skipped.
+    Returns a dict mapping each checked name to its plan lines.
+    """
+    plans = {}
+    failures = []
+    for name in sorted(HOT_QUERIES if names is None else names):
+        sql = SQL[name]
+        try:
+            rows = db.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?")).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                continue
+            raise
+        plans[name] = [row[-1] for row in rows]
+        scans = _full_scans(plans[name])
+        if scans:
+            failures.append(f"{name}: {'; '.join(scans)}")
+    if failures:
+        raise QueryPlanError("Hot statements scan whole tables:\n" + "\n".join(failures))
+    return plans
+
+
+class TrackingConnection(sqlite3.Connection):
+    """Connection that records the SQL text of every statement executed through it.
+
+    Pass it as factory to get_db. misses() replays the recorded statements
+    through an LRU cache of the connection's size, which is how sqlite3 caches
+    prepared statements, and returns how many had to be prepared again.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cached_statements = kwargs.get("cached_statements", 128)
+        self.statements = []
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or _TrackingCursor)
+
+    def execute(self, sql, parameters=()):
+        self.statements.append(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        self.statements.append(sql)
+        return super().executemany(sql, parameters)
+
+    def misses(self) -> int:
+        """Returns how many recorded statements were not in the cache when executed."""
+        cache = collections.OrderedDict()
+        missed = 0
+        for sql in self.statements:
+            if sql in cache:
+                cache.move_to_end(sql)
+                continue
+            missed += 1
+            cache[sql] = None
+            if len(cache) > self.cached_statements:
+                cache.popitem(last=False)
+        return missed
+
+
+class _TrackingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.statements.append(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        self.connection.statements.append(sql)
+        return super().executemany(sql, parameters)
@@ -0,0 +1,170 @@
+# Replica Module - Read-only snapshots of the live database for analytics
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback when the source changes too often."""
+
+
+class Replica:
+    """One read-only copy of the primary database."""
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot_started = None   # wall clock time the copied data is from
+        self.snapshot_finished = None
+
+    def is_ready(self) -> bool:
+        return self.snapshot_started is not None and os.path.exists(self.path)
+
+
+class ReplicaManager:
+    """Keeps read-only replicas of the primary database fresh with the backup API.
+
+    Each refresh copies the primary into a temporary file in chunks of
+    pages_per_step pages, sleeping step_pause seconds between chunks so the
+    writer can take its lock, and then atomically replaces the stalest
+    replica. SQLite restarts a chunked backup whenever another connection
+    writes to the source; after max_restarts restarts the copy is done in a
+    single step instead, which in WAL mode only needs a read snapshot and
+    does not block writers either.
+    """
+    def __init__(self, primary_path: str, replica_dir: str = None, replicas: int = 2, pages_per_step: int = 256,
+                 step_pause: float = 0.001, interval: float = 5.0, max_restarts: int = 3, wal: bool = True):
+        self.primary_path = primary_path
+        self.replica_dir = replica_dir or os.path.dirname(os.path.abspath(primary_path))
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self.interval = interval
+        self.max_restarts = max_restarts
+        base = os.path.splitext(os.path.basename(primary_path))[0]
+        self.replicas = [Replica(os.path.join(self.replica_dir, f"{base}.replica{i}.db")) for i in range(replicas)]
+        self.snapshots = 0
+        self.restarts = 0
+        self.last_snapshot_seconds = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if wal:
+            source = sqlite3.connect(primary_path)
+            source.execute("PRAGMA journal_mode=WAL")
+            source.close()
+
+    # Copies the primary into the stalest replica
+    def refresh(self) -> Replica:
+        """Takes a new snapshot of the primary and returns the refreshed replica."""
+        with self._refresh_lock:
+            with self._lock:
+                replica = min(self.replicas, key=lambda r: r.snapshot_started or 0)
+            tmp_path = replica.path + ".tmp"
+            start = time.monotonic()
+            snapshot_started = self._copy(tmp_path)
+            os.replace(tmp_path, replica.path)
+            elapsed = time.monotonic() - start
+            with self._lock:
+                replica.snapshot_started = snapshot_started
+                replica.snapshot_finished = time.time()
+                self.snapshots += 1
+                self.last_snapshot_seconds = elapsed
+            return replica
+
+    def _copy(self, tmp_path: str) -> float:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(tmp_path)
+        try:
+            restarts = 0
+            while True:
+                state = {"remaining": None}
+
+                def progress(status, remaining, total):
+                    # remaining grows again when SQLite restarted the copy after a write
+                    if state["remaining"] is not None and remaining > state["remaining"]:
+                        raise _BackupRestarted()
+                    state["remaining"] = remaining
+                    if self.step_pause:
+                        time.sleep(self.step_pause)
+
+                snapshot_started = time.time()
+                try:
+                    if restarts >= self.max_restarts:
+                        source.backup(target, pages=-1)
+                    else:
+                        source.backup(target, pages=self.pages_per_step, progress=progress)
+                    break
+                except _BackupRestarted:
+                    restarts += 1
+                    with self._lock:
+                        self.restarts += 1
+            target.execute("PRAGMA journal_mode=DELETE")  # replicas are opened read-only
+            return snapshot_started
+        finally:
+            target.close()
+            source.close()
+
+    def freshest(self):
+        """Returns the replica with the newest snapshot, or None before the first refresh."""
+        with self._lock:
+            ready = [r for r in self.replicas if r.is_ready()]
+            return max(ready, key=lambda r: r.snapshot_started) if ready else None
+
+    def lag(self) -> float:
+        """Seconds between now and the data in the freshest replica (None without replicas)."""
+        replica = self.freshest()
+        return time.time() - replica.snapshot_started if replica else None
+
+    # Opens a read-only connection to the freshest replica
+    @contextlib.contextmanager
+    def reader(self):
+        """Yields a read-only connection to the freshest replica."""
+        replica = self.freshest()
+        if replica is None:
+            raise RuntimeError("No replica available yet, call refresh() first")
+        db = sqlite3.connect(f"file:{replica.path}?mode=ro", uri=True)
+        try:
+            db.execute("PRAGMA query_only = ON")
+            yield db
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        """Returns replica lag and snapshot timings."""
+        lag = self.lag()
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "ready": sum(r.is_ready() for r in self.replicas),
+                "lag_seconds": lag,
+                "last_snapshot_seconds": self.last_snapshot_seconds,
+                "snapshots": self.snapshots,
+                "restarts": self.restarts,
+            }
+
+    # Background refresh loop
+    def start(self):
+        """Refreshes the replicas every interval seconds in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing replica: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        """Stops the background refresh thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
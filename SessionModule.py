@@ -0,0 +1,175 @@
+# Session Module - Issues signed session tokens and resolves them to cached users
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from DBModule import User, add_user_change_listener
+
+
+# Creates the optional sessions table
+def create_session_table(db):
+    """Create the sessions table used to persist sessions across restarts."""
+    cur = db.cursor()
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)")
+    db.commit()
+    cur.close()
+
+
+class Session:
+    """A logged-in user with the time the session expires."""
+    def __init__(self, session_id: str, user: User, expires_at: float):
+        self.session_id = session_id
+        self.user = user
+        self.expires_at = expires_at
+
+
+class SessionManager:
+    """In-memory session table with expiry and a bounded size.
+
+    Tokens have the form "<session id>.<expiry>.<signature>", where the
+    signature is an HMAC-SHA256 under the manager's secret. Forged or expired
+    tokens are rejected before any lookup. When a database connection is
+    passed, sessions are also written to the sessions table so they survive
+    a restart; the table is only read when a token is not in memory.
+    Sessions of a user are revoked when the account is deleted or its
+    password changes through DBModule.
+    """
+    def __init__(self, secret: bytes = None, ttl: float = 3600.0, max_sessions: int = 10000, db=None):
+        self.secret = secret or os.urandom(32)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        if db is not None:
+            create_session_table(db)
+        add_user_change_listener(self.revoke_user)
+
+    def _sign(self, session_id: str, expires_at: int) -> str:
+        message = f"{session_id}.{expires_at}".encode()
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest()
+
+    def _parse(self, token: str):
+        try:
+            session_id, expires_at, signature = token.split(".")
+            expires_at = int(expires_at)
+        except (AttributeError, ValueError):
+            return None
+        if not hmac.compare_digest(signature.encode(), self._sign(session_id, expires_at).encode()):
+            return None
+        if expires_at <= time.time():
+            return None
+        return session_id, expires_at
+
+    def _store(self, session: Session):
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    # Logs a user in and issues a token
+    def login(self, db, username: str, password: str):
+        """Verifies the credentials and returns a new token, or None."""
+        user = User.try_login(db, username, password)
+        if not user:
+            return None
+        return self.issue(user)
+
+    # Issues a token for an already authenticated user
+    def issue(self, user: User) -> str:
+        """Creates a session for the user and returns its signed token."""
+        session_id = secrets.token_urlsafe(16)
+        expires_at = int(time.time() + self.ttl)
+        self._store(Session(session_id, user, expires_at))
+        if self.db is not None:
+            self.db.execute("INSERT INTO sessions (session_id, user_id, expires_at) VALUES (?, ?, ?)",
+                            (session_id, user.user_id, expires_at))
+            self.db.commit()
+        return f"{session_id}.{expires_at}.{self._sign(session_id, expires_at)}"
+
+    # Resolves a token to its user
+    def resolve(self, token: str):
+        """Returns the cached User for a valid token, or None."""
+        parsed = self._parse(token)
+        if not parsed:
+            return None
+        session_id, expires_at = parsed
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+                return session.user
+            self.misses += 1
+        if self.db is None:
+            return None
+        row = self.db.execute("SELECT user_id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if not row:
+            return None
+        user = User.find_user_by_id(self.db, row[0])
+        if not user:
+            return None
+        self._store(Session(session_id, user, expires_at))
+        return user
+
+    # Ends a session
+    def revoke(self, token: str) -> bool:
+        """Removes the session for a token."""
+        parsed = self._parse(token)
+        if not parsed:
+            return False
+        session_id = parsed[0]
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+        if self.db is not None:
+            cur = self.db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self.db.commit()
+            removed = removed or cur.rowcount > 0
+        return removed
+
+    # Ends all sessions of a user
+    def revoke_user(self, user_id: int) -> int:
+        """Removes every session belonging to a user."""
+        with self._lock:
+            session_ids = [sid for sid, session in self._sessions.items() if session.user.user_id == user_id]
+            for sid in session_ids:
+                del self._sessions[sid]
+        removed = len(session_ids)
+        if self.db is not None:
+            cur = self.db.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            self.db.commit()
+            removed = max(removed, cur.rowcount)
+        return removed
+
+    # Drops expired sessions
+    def purge_expired(self) -> int:
+        """Removes expired sessions from memory and the sessions table."""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if session.expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        removed = len(expired)
+        if self.db is not None:
+            cur = self.db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self.db.commit()
+            removed = max(removed, cur.rowcount)
+        return removed
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,163 @@
+# Write-Behind Module - Queues completions and writes them in group commits
+import sqlite3
+import threading
+import time
+from collections import deque
+from QueryModule import SQL
+
+
+class WriteBehindStats:
+    """Counters of a CompletionWriter."""
+    def __init__(self):
+        self.events = 0
+        self.batches = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self.commit_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "failed": self.failed,
+            "largest_batch": self.largest_batch,
+            "events_per_batch": self.events / self.batches if self.batches else 0.0,
+            "commit_seconds": self.commit_seconds,
+        }
+
+
+class CompletionWriter:
+    """Single writer thread that stores completions in group commits.
+
+    submit() keeps the new streak in memory, so Streak.get_streak returns it
+    right away, and queues the completion. The writer thread commits the
+    queue every interval seconds or as soon as max_batch completions are
+    waiting, with one transaction per batch instead of one per completion.
+    Streaks leave the in-memory state once their last queued change is
+    committed.
+
+    With wal=True the database is switched to WAL with synchronous=NORMAL:
+    commits no longer wait for fsync, and a power loss can lose the last
+    commits but never corrupts the database.
+    """
+    def __init__(self, path: str, interval: float = 0.05, max_batch: int = 256, wal: bool = True):
+        self.path = path
+        self.interval = interval
+        self.max_batch = max_batch
+        self.wal = wal
+        self.stats = WriteBehindStats()
+        self._queue = deque()
+        self._state = {}  # (user_id, habit_id) -> [current, longest, last_completed, queued changes]
+        self._submitted = 0
+        self._committed = 0
+        self._condition = threading.Condition()
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="completion-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, user_id: int, habit_id: int, current_streak: int, longest_streak: int, completed_on):
+        """Records a completion with the resulting streak and queues it for the writer."""
+        key = (user_id, habit_id)
+        completed_on = str(completed_on)
+        with self._condition:
+            entry = self._state.get(key)
+            queued = entry[3] if entry else 0
+            self._state[key] = [current_streak, longest_streak, completed_on, queued + 1]
+            self._queue.append((user_id, habit_id, current_streak, longest_streak, completed_on))
+            self._submitted += 1
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._condition.notify_all()  # Starts the interval, or flushes a full batch
+
+    def pending_streak(self, user_id: int, habit_id: int):
+        """Returns (current, longest, last_completed) of a streak with uncommitted changes, or None."""
+        with self._condition:
+            entry = self._state.get((user_id, habit_id))
+            return tuple(entry[:3]) if entry else None
+
+    def depth(self) -> int:
+        """Returns the number of completions waiting for the writer."""
+        return len(self._queue)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until everything submitted so far is committed; False on timeout."""
+        with self._condition:
+            target = self._submitted
+            if self._committed >= target:
+                return True
+            if self._thread is None:
+                raise RuntimeError("CompletionWriter is not running")
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self):
+        """Flushes the queue and stops the writer thread."""
+        if self._thread is None:
+            return
+        self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA foreign_keys = ON;")
+        if self.wal:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+        return db
+
+    def _run(self):
+        db = self._connect()
+        try:
+            while True:
+                with self._condition:
+                    while not (self._queue or self._stopping or self._flush_requested):
+                        self._condition.wait()
+                    deadline = time.monotonic() + self.interval
+                    while not (self._stopping or self._flush_requested or len(self._queue) >= self.max_batch):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    if len(self._queue) <= self.max_batch:
+                        self._flush_requested = False  # This batch empties the queue
+                    batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+                    if not batch and self._stopping:
+                        return
+                if batch:
+                    self._write(db, batch)
+        finally:
+            db.close()
+
+    def _write(self, db, batch):
+        start = time.perf_counter()
+        try:
+            db.executemany(SQL["insert_completion"], [(u, h, day) for u, h, _, _, day in batch])
+            db.executemany(SQL["update_streak"], [(c, l, day, u, h) for u, h, c, l, day in batch])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.stats.failed += len(batch)
+            print(f"Error writing completions: {e}")
+        self.stats.commit_seconds += time.perf_counter() - start
+        with self._condition:
+            for user_id, habit_id, *_ in batch:
+                entry = self._state[(user_id, habit_id)]
+                entry[3] -= 1
+                if entry[3] == 0:
+                    del self._state[(user_id, habit_id)]
+            self._committed += len(batch)
+            self.stats.events += len(batch)
+            self.stats.batches += 1
+            self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+            self._condition.notify_all()
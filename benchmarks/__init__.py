@@ -0,0 +1 @@
+# Benchmarks for the Habit Tracking App, run with `python -m benchmarks.<name>`
@@ -0,0 +1,57 @@
+# Benchmark - overhead of the instrumentation layer when disabled and enabled
+import argparse
+import contextlib
+import io
+import sqlite3
+import time
+
+import MetricsModule
+from DBModule import User, Habit, Streak, create_tables
+
+
+def timed(func, calls: int) -> float:
+    """Returns the mean cost of one call in microseconds (best of 5 runs)."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of the instrumentation layer")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--budget-us", type=float, default=1.0, help="allowed overhead per call when disabled")
+    args = parser.parse_args()
+
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        user = User.add_user(db, "user1", "password123", "user1@example.com")
+        habit_id = Habit.add_habit(db, user, "Exercise", "Morning run", "2025-01-01", "Daily")
+
+    raw_get_streak = Streak.get_streak.__wrapped__
+    raw = timed(lambda: raw_get_streak(db, user.user_id, habit_id), args.calls)
+
+    MetricsModule.disable()
+    disabled = timed(lambda: Streak.get_streak(db, user.user_id, habit_id), args.calls)
+
+    MetricsModule.enable()
+    MetricsModule.attach(db)
+    enabled = timed(lambda: Streak.get_streak(db, user.user_id, habit_id), args.calls)
+    MetricsModule.disable()
+    MetricsModule.detach(db)
+
+    overhead = disabled / raw - 1
+    print(f"{'Streak.get_streak (undecorated)':<36} {raw:>8.2f} us/call")
+    print(f"{'Streak.get_streak (disabled)':<36} {disabled:>8.2f} us/call ({overhead:+.1%})")
+    print(f"{'Streak.get_streak (enabled)':<36} {enabled:>8.2f} us/call ({enabled / raw - 1:+.1%})")
+    db.close()
+    if disabled - raw > args.budget_us:
+        raise SystemExit(f"Disabled overhead {disabled - raw:.2f} us exceeds budget {args.budget_us:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Benchmark - logins per second at several scrypt cost settings
+import argparse
+import contextlib
+import io
+import sqlite3
+import time
+
+import PasswordModule
+from DBModule import User, create_tables
+
+
+def setup_db(cost: int, users: int):
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(users):
+            User.add_user(db, f"user{i}", PasswordModule.hash_password("password123", cost=cost), f"user{i}@example.com")
+    return db
+
+
+def bench_logins(db, users: int, seconds: float) -> float:
+    """Returns logins/second while cycling through all users."""
+    logins = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        assert User.try_login(db, f"user{logins % users}", "password123") is not None
+        logins += 1
+    return logins / (time.perf_counter() - start)
+
+
+def bench_parallel_verify(stored: str, total: int) -> float:
+    """Returns verifications/second through the thread pool."""
+    start = time.perf_counter()
+    futures = [PasswordModule.verify_password_async("password123", stored) for _ in range(total)]
+    assert all(future.result() for future in futures)
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logins per second at several scrypt cost settings")
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 12, 14])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'cost':>4} {'uncached/s':>12} {'cached/s':>12} {'pool/s':>12}")
+    for cost in args.costs:
+        PasswordModule.set_cost(cost)
+        db = setup_db(cost, args.users)
+
+        PasswordModule.verification_cache.clear()
+        PasswordModule.verification_cache.ttl = 0  # every login verifies
+        uncached = bench_logins(db, args.users, args.seconds)
+
+        PasswordModule.verification_cache.ttl = 300
+        cached = bench_logins(db, args.users, args.seconds)
+
+        stored = PasswordModule.hash_password("password123", cost=cost)
+        pooled = bench_parallel_verify(stored, max(8, int(uncached * args.seconds)))
+        print(f"{cost:>4} {uncached:>12.1f} {cached:>12.1f} {pooled:>12.1f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
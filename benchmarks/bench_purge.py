@@ -0,0 +1,67 @@
+# Benchmark - batch account deletion: hard cascading delete vs. tombstone and chunked purge
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from DBModule import User, get_db, close_db
+from PurgeModule import Purger
+from benchmarks.datagen import Scale, generate
+
+
+INDEXES = ("idx_habits_user_id", "idx_streaks_user_habit", "idx_streaks_habit_id")
+
+
+def build(path: str, scale: Scale, indexes: bool):
+    db = get_db(path)
+    generate(db, scale)
+    if not indexes:
+        for name in INDEXES:
+            db.execute(f"DROP INDEX IF EXISTS {name}")
+        db.commit()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch account deletion throughput")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--habits", type=int, default=10)
+    parser.add_argument("--delete", type=int, default=500, help="accounts to delete")
+    parser.add_argument("--time-slice", type=float, default=0.02)
+    args = parser.parse_args()
+    scale = Scale("purge", args.users, args.habits, history_days=30)
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        # Old behaviour: cascading DELETE inside the request, without child indexes
+        db = build(os.path.join(directory, "hard.db"), scale, indexes=False)
+        names = [row[0] for row in db.execute("SELECT username FROM users LIMIT ?", (args.delete,))]
+        start = time.perf_counter()
+        for name in names:
+            db.execute("DELETE FROM users WHERE username = ?", (name,))
+            db.commit()
+        hard = (time.perf_counter() - start) / len(names)
+        close_db(db)
+
+        db = build(os.path.join(directory, "soft.db"), scale, indexes=True)
+        names = [row[0] for row in db.execute("SELECT username FROM users LIMIT ?", (args.delete,))]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            for name in names:
+                User.delete_user_by_name(db, name)
+        soft = (time.perf_counter() - start) / len(names)
+        purger = Purger(db, time_slice=args.time_slice)
+        stats = purger.purge().as_dict()
+        close_db(db)
+
+    print(f"{args.users} users x {args.habits} habits, deleting {args.delete} accounts")
+    print(f"{'hard cascading delete (no indexes)':<40} {hard * 1e3:>10.3f} ms/account")
+    print(f"{'tombstone (delete_user_by_name)':<40} {soft * 1e3:>10.3f} ms/account")
+    print(f"{'background purge':<40} {stats['rows_per_second']:>10.0f} rows/s "
+          f"({stats['rows']} rows, {stats['chunks']} chunks, {stats['seconds']:.2f} s)")
+    print(f"{'longest write transaction':<40} {stats['max_lock_seconds'] * 1e3:>10.3f} ms "
+          f"(slice {args.time_slice * 1e3:.1f} ms, {stats['interrupted']} interrupted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Benchmark - FTS5 habit search compared to LIKE scans
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from DBModule import Habit, User, create_tables, get_db, close_db
+
+
+WORDS = ("run walk read write swim yoga stretch meditate journal water sleep cook budget save call family "
+         "friends garden clean plan review learn practice guitar piano language study code paint draw "
+         "morning evening daily weekly monthly minutes pages glasses steps kilometers").split()
+
+
+def populate(db, habits: int, habits_per_user: int, seed: int):
+    rng = random.Random(seed)
+    users = max(1, habits // habits_per_user)
+    db.executemany("INSERT INTO users (user_id, username, password, emailID) VALUES (?, ?, 'x', 'x')",
+                   ((i, f"user{i}") for i in range(1, users + 1)))
+    batch = []
+    for n in range(habits):
+        name = " ".join(rng.sample(WORDS, 2)).capitalize()
+        description = " ".join(rng.sample(WORDS, 6))
+        batch.append((n // habits_per_user + 1, f"{name} {n}", description, "2025-01-01", "Daily"))
+        if len(batch) == 10000:
+            db.executemany("INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type) "
+                           "VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        db.executemany("INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type) "
+                       "VALUES (?, ?, ?, ?, ?)", batch)
+    db.commit()
+    return users
+
+
+def like_search(db, query: str, per_page: int, user_id: int = None):
+    """LIKE search with the same contract as Habit.search: name matches first, then by id."""
+    sql = "SELECT habit_id FROM habits WHERE (habit_name LIKE ? OR habit_description LIKE ?)"
+    params = [f"%{query}%", f"%{query}%"]
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    sql += " ORDER BY habit_name LIKE ? DESC, habit_id LIMIT ?"
+    return db.execute(sql, params + [f"%{query}%", per_page]).fetchall()
+
+
+def timed(operation, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        operation(i)
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS5 habit search compared to LIKE scans")
+    parser.add_argument("--habits", type=int, default=1_000_000)
+    parser.add_argument("--habits-per-user", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = get_db(os.path.join(directory, "search.db"))
+        create_tables(db)
+        start = time.perf_counter()
+        users = populate(db, args.habits, args.habits_per_user, args.seed)
+        print(f"Inserted {args.habits} habits for {users} users in {time.perf_counter() - start:.1f} s (with FTS triggers)")
+        rng = random.Random(args.seed)
+        queries = [rng.choice(WORDS) for _ in range(args.repeat)]
+        rare = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(args.repeat)]
+        user_ids = [rng.randint(1, users) for _ in range(args.repeat)]
+
+        results = [
+            ("all users, 1 keyword, FTS5", timed(lambda i: Habit.search_all_users(db, queries[i]), args.repeat)),
+            ("all users, 1 keyword, LIKE", timed(lambda i: like_search(db, queries[i], 20), args.repeat)),
+            ("all users, 3 keywords, FTS5", timed(lambda i: Habit.search_all_users(db, rare[i]), args.repeat)),
+            ("all users, 4th page, FTS5", timed(lambda i: Habit.search_all_users(db, queries[i], page=4), args.repeat)),
+            ("all users, no match, FTS5", timed(lambda i: Habit.search_all_users(db, "zzzz"), args.repeat)),
+            ("all users, no match, LIKE", timed(lambda i: like_search(db, "zzzz", 20), args.repeat)),
+            ("one user, 1 keyword, FTS5",
+             timed(lambda i: Habit.search(db, User(user_ids[i], "", "", ""), queries[i]), args.repeat)),
+            ("one user, 1 keyword, LIKE", timed(lambda i: like_search(db, queries[i], 20, user_ids[i]), args.repeat)),
+        ]
+        for name, ms in results:
+            print(f"{name:<32} {ms:>10.2f} ms/query")
+        close_db(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Benchmark - per-request authentication cost with and without sessions
+import argparse
+import contextlib
+import io
+import sqlite3
+import time
+
+import PasswordModule
+from DBModule import User, create_tables
+from SessionModule import SessionManager
+
+
+def timed(operation, requests: int) -> float:
+    """Returns the mean cost of one request in microseconds."""
+    start = time.perf_counter()
+    for i in range(requests):
+        operation(i)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request authentication cost with and without sessions")
+    parser.add_argument("--cost", type=int, default=14)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    PasswordModule.set_cost(args.cost)
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.users):
+            User.add_user(db, f"user{i}", PasswordModule.hash_password("password123"), f"user{i}@example.com")
+
+    def login_every_request(i):
+        assert User.try_login(db, f"user{i % args.users}", "password123")
+
+    PasswordModule.verification_cache.ttl = 0
+    uncached = timed(login_every_request, args.requests)
+    PasswordModule.verification_cache.ttl = 300
+    cached = timed(login_every_request, args.requests)
+
+    sessions = SessionManager()
+    tokens = [sessions.issue(User.find_user(db, f"user{i}")) for i in range(args.users)]
+    in_memory = timed(lambda i: sessions.resolve(tokens[i % args.users]), args.requests * 100)
+
+    persisted = SessionManager(db=db)
+    tokens = [persisted.issue(User.find_user(db, f"user{i}")) for i in range(args.users)]
+    cold = SessionManager(secret=persisted.secret, db=db)
+    from_table = timed(lambda i: cold.resolve(tokens[i % args.users]), args.users)
+
+    print(f"scrypt cost {args.cost}, {args.users} users")
+    print(f"{'try_login (no cache)':<32} {uncached:>12.1f} us/request")
+    print(f"{'try_login (verification cache)':<32} {cached:>12.1f} us/request")
+    print(f"{'session resolve (memory)':<32} {in_memory:>12.1f} us/request")
+    print(f"{'session resolve (sessions table)':<32} {from_table:>12.1f} us/request")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
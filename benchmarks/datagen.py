@@ -0,0 +1,109 @@
+# Synthetic data generator for benchmarks and scale tests
+import contextlib
+import os
+import random
+from datetime import date, timedelta
+
+from DBModule import Habit, create_tables
+
+
+DEFAULT_TYPE_MIX = {"Daily": 0.5, "Weekly": 0.35, "Monthly": 0.15}
+START_DATE = date(2025, 1, 1)
+
+# Days between completions for each habit type; a gap outside the period breaks the streak
+_GAPS = {"Daily": (1, 1, 1, 1, 2), "Weekly": (7, 7, 8, 10, 15), "Monthly": (28, 31, 31, 35, 70)}
+
+
+class Scale:
+    """Size of a generated data set."""
+    def __init__(self, name: str, users: int, habits_per_user: int, history_days: int, type_mix: dict = None):
+        self.name = name
+        self.users = users
+        self.habits_per_user = habits_per_user
+        self.history_days = history_days
+        self.type_mix = type_mix or DEFAULT_TYPE_MIX
+
+    def as_dict(self) -> dict:
+        return {"users": self.users, "habits_per_user": self.habits_per_user,
+                "history_days": self.history_days, "type_mix": self.type_mix}
+
+
+SCALES = {
+    "small": Scale("small", users=10, habits_per_user=5, history_days=30),
+    "medium": Scale("medium", users=200, habits_per_user=10, history_days=180),
+    "large": Scale("large", users=2000, habits_per_user=10, history_days=365),
+}
+
+
+def completion_dates(rng: random.Random, habit_type: str, history_days: int):
+    """Yields ascending completion dates within the history window."""
+    day = START_DATE + timedelta(days=rng.randrange(0, 7))
+    end = START_DATE + timedelta(days=history_days)
+    gaps = _GAPS[habit_type]
+    while day < end:
+        yield day
+        day += timedelta(days=rng.choice(gaps))
+
+
+def replay_streak(habit, dates):
+    """Replays completions through calculate_streak.
+
+    Returns (current, longest, last_completed, counted dates), where counted
+    dates are the completions that changed the streak.
+    """
+    current, longest, last = 0, 0, None
+    counted = []
+    for day in dates:
+        current, changed = habit.calculate_streak(day, last, current)
+        if changed:
+            longest = max(longest, current)
+            last = day.isoformat()
+            counted.append(day)
+    return current, longest, last, counted
+
+
+# Fills a database with users, habits and streaks
+def generate(db, scale: Scale, seed: int = 42, history: bool = False) -> dict:
+    """Generates users, habits and consistent streak rows for a scale.
+
+    Rows are inserted in one transaction per user, and every streak row is
+    the result of replaying a random completion history through the habit's
+    own calculate_streak. With history=True the counted completions are
+    also stored in the completions table.
+    """
+    create_tables(db)
+    rng = random.Random(seed)
+    types = list(scale.type_mix)
+    weights = [scale.type_mix[t] for t in types]
+    cur = db.cursor()
+    first_user = (cur.execute("SELECT COALESCE(MAX(user_id), 0) FROM users").fetchone()[0]) + 1
+    completion_count = 0
+    habit_count = 0
+    devnull = open(os.devnull, "w")
+    for offset in range(scale.users):
+        user_id = first_user + offset
+        cur.execute("INSERT INTO users (user_id, username, password, emailID) VALUES (?, ?, ?, ?)",
+                    (user_id, f"user{user_id}", "x" * 64, f"user{user_id}@example.com"))
+        for n in range(scale.habits_per_user):
+            habit_type = rng.choices(types, weights)[0]
+            cur.execute("INSERT INTO habits (user_id, habit_name, habit_description, start_date, habit_type) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user_id, f"{habit_type} habit {n}", f"Generated {habit_type.lower()} habit",
+                         START_DATE.isoformat(), habit_type))
+            habit_id = cur.lastrowid
+            habit = Habit._from_raw((habit_id, "", "", START_DATE.isoformat(), habit_type))
+            dates = list(completion_dates(rng, habit_type, scale.history_days))
+            with contextlib.redirect_stdout(devnull):  # calculate_streak prints debug output
+                current, longest, last, counted = replay_streak(habit, dates)
+            cur.execute("INSERT INTO streaks (user_id, habit_id, current_streak, longest_streak, last_completed) "
+                        "VALUES (?, ?, ?, ?, ?)", (user_id, habit_id, current, longest, last))
+            if history:
+                cur.executemany("INSERT INTO completions (user_id, habit_id, completed_on) VALUES (?, ?, ?)",
+                                [(user_id, habit_id, day.isoformat()) for day in counted])
+                completion_count += len(counted)
+            habit_count += 1
+        db.commit()
+    cur.close()
+    devnull.close()
+    return {"users": scale.users, "habits": habit_count, "completions": completion_count,
+            "first_user_id": first_user}
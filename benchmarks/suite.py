@@ -0,0 +1,172 @@
+# Benchmark suite - times the DBModule and AnalyticalModule hot paths at several scales
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from DBModule import User, Habit, Streak, get_db, close_db
+from AnalyticalModule import habits_with_periodicity, longest_streaks, longest_streak_for_habit
+from benchmarks.datagen import SCALES, START_DATE, generate
+
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results.json")
+PASSWORD_HASH = "x" * 64  # password hashing has its own benchmark
+
+
+def summarize(latencies) -> dict:
+    """Returns latency statistics in microseconds for a list of seconds."""
+    ordered = sorted(latencies)
+    def pct(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+    total = sum(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_us": total / len(ordered) * 1e6,
+        "p50_us": pct(0.50),
+        "p95_us": pct(0.95),
+        "p99_us": pct(0.99),
+        "stdev_us": statistics.pstdev(ordered) * 1e6,
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+    }
+
+
+def measure(operation, iterations: int) -> dict:
+    """Calls operation(i) for each iteration and returns its latency statistics."""
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+# Runs every benchmark against one generated database
+def run_scale(scale, iterations: int, seed: int, directory: str) -> dict:
+    path = os.path.join(directory, f"{scale.name}.db")
+    db = get_db(path)
+    generate(db, scale, seed=seed)
+    rng = random.Random(seed)
+    users = [User(*row) for row in db.execute("SELECT user_id, username, password, emailID FROM users")]
+    raw_habits = db.execute("SELECT habit_id, habit_name, habit_description, start_date, habit_type, user_id "
+                            "FROM habits").fetchall()
+    habits = [(Habit._from_raw(raw[:5]), raw[5]) for raw in raw_habits]
+    sample_users = [rng.choice(users) for _ in range(iterations)]
+    sample_habits = [rng.choice(habits) for _ in range(iterations)]
+    after_history = START_DATE + timedelta(days=scale.history_days)
+    new_users = []
+
+    def add_user(i):
+        new_users.append(User.add_user(db, f"bench{scale.name}{i}", PASSWORD_HASH, f"bench{i}@example.com"))
+
+    def add_habit(i):
+        Habit.add_habit(db, sample_users[i], f"Bench habit {i}", "Benchmark habit", START_DATE.isoformat(), "Daily")
+
+    def add_predefined_habits(i):
+        Habit.add_predefined_habits(db, new_users[i])
+
+    def complete(i):
+        habit, user_id = sample_habits[i]
+        habit.complete(db, user_id, after_history + timedelta(days=i))
+
+    def list_habits_for_user(i):
+        Habit.list_habits_for_user(db, sample_users[i])
+
+    def get_streak(i):
+        habit, user_id = sample_habits[i]
+        Streak.get_streak(db, user_id, habit.habit_id)
+
+    def dashboard_periodicity(i):
+        habits_with_periodicity(db, sample_users[i], ("Daily", "Weekly", "Monthly")[i % 3])
+
+    def dashboard_longest_streaks(i):
+        longest_streaks(db, sample_users[i])
+
+    def dashboard_habit_streak(i):
+        habit, user_id = sample_habits[i]
+        longest_streak_for_habit(db, User(user_id, "", "", ""), habit)
+
+    benchmarks = [add_user, add_habit, add_predefined_habits, complete, list_habits_for_user, get_streak,
+                  dashboard_periodicity, dashboard_longest_streaks, dashboard_habit_streak]
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for benchmark in benchmarks:
+            results[benchmark.__name__] = measure(benchmark, iterations)
+    close_db(db)
+    return results
+
+
+# Compares results against a baseline file
+def compare(results: dict, baseline: dict, threshold: float):
+    """Returns (rows, regressions) comparing mean latency per scale and operation."""
+    rows, regressions = [], []
+    for scale, operations in results["results"].items():
+        for name, stats in operations.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if not base:
+                continue
+            ratio = stats["mean_us"] / base["mean_us"] if base["mean_us"] else 1.0
+            row = (scale, name, base["mean_us"], stats["mean_us"], ratio)
+            rows.append(row)
+            if ratio > 1 + threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the Habit Tracking App")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], choices=sorted(SCALES))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also store the results as a new baseline")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scales": {name: SCALES[name].as_dict() for name in args.scales},
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.scales:
+            results["results"][name] = run_scale(SCALES[name], args.iterations, args.seed, directory)
+
+    print(f"{'scale':<8} {'operation':<28} {'mean us':>10} {'p95 us':>10} {'ops/s':>10}")
+    for scale, operations in results["results"].items():
+        for name, stats in operations.items():
+            print(f"{scale:<8} {name:<28} {stats['mean_us']:>10.1f} {stats['p95_us']:>10.1f} {stats['ops_per_sec']:>10.0f}")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold)
+        print(f"\nComparison with {args.baseline} (threshold {args.threshold:.0%})")
+        for scale, name, before, after, ratio in rows:
+            flag = "REGRESSION" if ratio > 1 + args.threshold else ""
+            print(f"{scale:<8} {name:<28} {before:>10.1f} -> {after:>10.1f} {ratio:>6.2f}x {flag}")
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import pytest
+import sqlite3
+from datetime import date, timedelta
+import AnalyticalModule
+from ArchiveModule import Archive, ArchiveFile, archive_cutoff
+from DBModule import User, Habit, Daily, create_tables
+
+
+def get_test_db():
+    """
+    Create a test database with one daily habit completed on 400 consecutive days.
+    """
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    habit_id = Habit.add_habit(db, user, "Exercise", "Morning run", "2024-01-01", "Daily")
+    habit = Daily(habit_id, "Exercise", "Morning run", "2024-01-01")
+    for day in range(400):
+        habit.complete(db, user.user_id, date(2024, 1, 1) + timedelta(days=day))
+    return db, user, habit
+
+
+def test_archive_moves_old_completions(tmp_path):
+    """
+    Test that completions before the cutoff move into per-year files and counters stay in the hot DB.
+    """
+    db, user, habit = get_test_db()
+    archive = Archive(str(tmp_path))
+    moved = archive.archive(db, date(2025, 1, 1))
+    assert moved == 366  # 2024 is a leap year
+    assert archive.years() == [2024]
+    assert len(habit.list_completions(db, user.user_id)) == 34  # Only 2025 left in the hot table
+    assert archive_cutoff(db) == date(2025, 1, 1)
+    assert db.execute("SELECT archived_count FROM completion_archive").fetchone()[0] == 366
+    assert AnalyticalModule.completion_count(db, user, habit) == 400
+    streak = db.execute("SELECT current_streak FROM streaks").fetchone()[0]
+    assert streak == 400  # Streak is untouched
+    archive.close()
+    db.close()
+
+
+def test_archive_is_idempotent(tmp_path):
+    """
+    Test that archiving the same rows again does not duplicate records.
+    """
+    db, user, habit = get_test_db()
+    archive = Archive(str(tmp_path))
+    archive._write_year(2024, [(habit.habit_id, user.user_id, date(2024, 1, 1).toordinal())])  # Left over from a crash
+    archive.archive(db, date(2024, 7, 1))
+    archive.archive(db, date(2025, 1, 1))
+    archive_file = ArchiveFile(archive.path(2024))
+    assert archive_file.count == 366
+    archive_file.close()
+    archive.close()
+    db.close()
+
+
+def test_completion_history_reads_through(tmp_path):
+    """
+    Test that analytics only reads the archive for ranges before the cutoff.
+    """
+    db, user, habit = get_test_db()
+    archive = Archive(str(tmp_path))
+    archive.archive(db, date(2025, 1, 1))
+    recent = AnalyticalModule.completion_history(db, user, habit, date(2025, 1, 10), date(2025, 1, 12))
+    assert recent == [date(2025, 1, 10), date(2025, 1, 11), date(2025, 1, 12)]
+    without_archive = AnalyticalModule.completion_history(db, user, habit, date(2024, 12, 30), date(2025, 1, 2))
+    assert without_archive == [date(2025, 1, 1), date(2025, 1, 2)]
+    AnalyticalModule.use_archive(archive)
+    try:
+        spanning = AnalyticalModule.completion_history(db, user, habit, date(2024, 12, 30), date(2025, 1, 2))
+        assert spanning == [date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 2)]
+        assert len(AnalyticalModule.completion_history(db, user, habit)) == 400
+    finally:
+        AnalyticalModule.use_archive(None)
+    archive.close()
+    db.close()
+
+
+def test_compact_drops_deleted_users(tmp_path):
+    """
+    Test that compaction removes archived records of deleted users.
+    """
+    db, user, habit = get_test_db()
+    archive = Archive(str(tmp_path))
+    archive.archive(db, date(2025, 1, 1))
+    User.delete_user_by_name(db, "testuser")
+    assert archive.compact(db) == 366
+    assert archive.read(habit.habit_id) == []
+    archive.close()
+    db.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
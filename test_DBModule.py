@@ -1,5 +1,7 @@
 import pytest
 import sqlite3
+import asyncio
+import hashlib
 from datetime import datetime, date, timedelta
 from DBModule import hash_password, get_db, close_db, User, create_tables, Habit, Daily, Weekly, Monthly, Streak
 from dateutil.relativedelta import relativedelta
@@ -107,7 +109,7 @@ def test_try_login():
     Test user login with correct and incorrect credentials.
     """
     db = get_test_db()
-    User.add_user(db, "testuser", "password123", "testuser@example.com")
+    User.add_user(db, "testuser", hash_password("password123"), "testuser@example.com")
     user = User.try_login(db, "testuser", "password123")
     assert user is not None  # Ensure user can log in with correct credentials
     assert user.username == "testuser"  # Ensure logged-in user matches
@@ -116,6 +118,34 @@ def test_try_login():
     db.close()
 
 
+def test_try_login_upgrades_legacy_hash():
+    """
+    Test that a legacy SHA-256 password is accepted once and rehashed with scrypt.
+    """
+    db = get_test_db()
+    legacy = hashlib.sha256("password123".encode()).hexdigest()
+    User.add_user(db, "testuser", legacy, "testuser@example.com")
+    user = User.try_login(db, "testuser", "password123")
+    assert user is not None  # Ensure legacy password still works
+    assert user.password.startswith("scrypt$")  # Ensure hash was upgraded
+    assert User.find_user(db, "testuser").password == user.password  # Ensure upgrade was stored
+    assert User.try_login(db, "testuser", "wrongpassword") is None
+    db.close()
+
+
+def test_try_login_async():
+    """
+    Test logging in with verification running in the password thread pool.
+    """
+    db = get_test_db()
+    User.add_user(db, "testuser", hash_password("password123", cost=4), "testuser@example.com")
+    user = asyncio.run(User.try_login_async(db, "testuser", "password123"))
+    assert user is not None
+    assert asyncio.run(User.try_login_async(db, "testuser", "wrongpassword")) is None
+    assert asyncio.run(User.try_login_async(db, "nobody", "password123")) is None
+    db.close()
+
+
 def test_delete_user():
     """
     Test deleting a user from the database.
@@ -395,6 +425,64 @@ def test_add_duplicate_habit():
     db.close()
 
 
+# Tests for Habit search
+
+def test_search_habits():
+    """
+    Test keyword search over habit names and descriptions, with prefixes and ranking.
+    """
+    db = get_test_db()
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    Habit.add_habit(db, user, "Running", "Run 5 km in the park", "2025-01-01", "Daily")
+    Habit.add_habit(db, user, "Park walk", "Walk the dog", "2025-01-01", "Daily")
+    Habit.add_habit(db, user, "Read", "Read a book", "2025-01-01", "Weekly")
+    assert [h.habit_name for h in Habit.search(db, user, "park")] == ["Park walk", "Running"]  # Name match ranks first
+    assert [h.habit_name for h in Habit.search(db, user, "run")] == ["Running"]  # Prefix match
+    assert [h.habit_name for h in Habit.search(db, user, "walk dog")] == ["Park walk"]  # All keywords must match
+    assert Habit.search(db, user, "swim") == []
+    assert Habit.search(db, user, "  ") == []
+    db.close()
+
+
+def test_search_habits_pagination_and_sync():
+    """
+    Test paging through results and that renames and deletions update the index.
+    """
+    db = get_test_db()
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    for i in range(5):
+        Habit.add_habit(db, user, f"Stretch {i}", "Stretching", "2025-01-01", "Daily")
+    pages = [Habit.search(db, user, "stretch", page=page, per_page=2) for page in (1, 2, 3, 4)]
+    assert [len(page) for page in pages] == [2, 2, 1, 0]
+    db.execute("UPDATE habits SET habit_name = 'Yoga', habit_description = 'Yoga' WHERE habit_name = 'Stretch 0'")
+    db.execute("DELETE FROM habits WHERE habit_name = 'Stretch 1'")
+    db.commit()
+    assert len(Habit.search(db, user, "stretch")) == 3
+    assert [h.habit_name for h in Habit.search(db, user, "yoga")] == ["Yoga"]
+    db.close()
+
+
+def test_search_all_users():
+    """
+    Test searching across users, skipping deleted accounts, with and without FTS5.
+    """
+    db = get_test_db()
+    alice = User.add_user(db, "alice", "password123", "alice@example.com")
+    bob = User.add_user(db, "bob", "password123", "bob@example.com")
+    Habit.add_habit(db, alice, "Meditate", "Ten minutes", "2025-01-01", "Daily")
+    Habit.add_habit(db, bob, "Meditate", "Twenty minutes", "2025-01-01", "Daily")
+    assert sorted(user_id for user_id, _ in Habit.search_all_users(db, "meditate")) == [alice.user_id, bob.user_id]
+    assert Habit.search(db, alice, "twenty") == []  # Other users' habits are not returned
+    User.delete_user_by_name(db, "bob")
+    assert [user_id for user_id, _ in Habit.search_all_users(db, "meditate")] == [alice.user_id]
+    for name in ("habits_fts_insert", "habits_fts_delete", "habits_fts_update"):
+        db.execute(f"DROP TRIGGER {name}")
+    db.execute("DROP TABLE habits_fts")
+    db.execute("DROP VIEW habits_search")
+    assert [user_id for user_id, _ in Habit.search_all_users(db, "medit")] == [alice.user_id]  # LIKE fallback
+    db.close()
+
+
 # Tests for Streak
 
 def test_get_streak():
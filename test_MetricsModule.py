@@ -0,0 +1,111 @@
+import pytest
+import json
+import sqlite3
+import threading
+import MetricsModule
+from DBModule import User, Habit, Daily, Streak, create_tables
+
+
+@pytest.fixture
+def metrics():
+    """
+    Enable instrumentation for one test and reset it afterwards.
+    """
+    MetricsModule.reset()
+    MetricsModule.enable()
+    yield MetricsModule
+    MetricsModule.disable()
+    MetricsModule.reset()
+
+
+def get_test_db():
+    """
+    Create a test database in memory with necessary tables.
+    """
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    return db
+
+
+def test_disabled_records_nothing():
+    """
+    Test that nothing is collected while instrumentation is off.
+    """
+    MetricsModule.reset()
+    db = get_test_db()
+    Streak.get_streak(db, 1, 1)
+    assert MetricsModule.snapshot() == {}
+    db.close()
+
+
+def test_complete_records_calls_and_statements(metrics):
+    """
+    Test that completing a habit records calls, nested operations and SQL statements.
+    """
+    db = get_test_db()
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    habit_id = Habit.add_habit(db, user, "Exercise", "Morning run", "2025-01-01", "Daily")
+    metrics.attach(db)
+    Daily(habit_id, "Exercise", "Morning run", "2025-01-01").complete(db, user.user_id)
+    Habit.list_habits_for_user(db, user)
+    data = metrics.snapshot()
+    assert data["Habit.complete"]["calls"] == 1
+    assert data["Streak.get_streak"]["calls"] == 1
+    assert data["Streak.update_streak"]["calls"] == 1
+    assert data["Streak.get_streak"]["statements"] == 1  # One SELECT
+    assert data["Habit.complete"]["statements"] >= 2  # Includes nested SELECT and UPDATE
+    assert data["Habit.list_habits_for_user"]["calls"] == 1
+    db.close()
+
+
+def test_first_call_of_new_operation_returns(metrics):
+    """
+    Test that the first call of a new operation is recorded without blocking.
+    """
+    result = []
+
+    @metrics.instrument("new_operation")
+    def new_operation():
+        return 42
+
+    worker = threading.Thread(target=lambda: result.append(new_operation()), daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert result == [42]  # Ensure the call did not deadlock
+    assert metrics.snapshot()["new_operation"]["calls"] == 1
+
+
+def test_errors_are_counted(metrics):
+    """
+    Test that failing calls are recorded as errors.
+    """
+    @metrics.instrument("failing")
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        failing()
+    assert metrics.snapshot()["failing"]["errors"] == 1
+
+
+def test_write_report_formats(metrics, tmp_path):
+    """
+    Test exporting the metrics as text, JSON and Prometheus text.
+    """
+    db = get_test_db()
+    Streak.get_streak(db, 1, 1)
+    metrics.write_report(tmp_path / "report.txt", "text")
+    metrics.write_report(tmp_path / "report.json", "json")
+    metrics.write_report(tmp_path / "report.prom", "prometheus")
+    assert "Streak.get_streak" in (tmp_path / "report.txt").read_text()
+    assert json.loads((tmp_path / "report.json").read_text())["Streak.get_streak"]["calls"] == 1
+    prom = (tmp_path / "report.prom").read_text()
+    assert 'habittracker_operation_seconds_count{operation="Streak.get_streak"} 1' in prom
+    assert 'le="+Inf"' in prom
+    with pytest.raises(ValueError):
+        metrics.write_report(tmp_path / "report.xml", "xml")
+    db.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
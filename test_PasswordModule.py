@@ -0,0 +1,76 @@
+import pytest
+import hashlib
+import time
+from PasswordModule import (hash_password, verify_password, needs_rehash, is_legacy_hash,
+                            verify_password_async, VerificationCache)
+
+
+def test_hash_password_is_salted():
+    """
+    Test that hashing the same password twice gives different results.
+    """
+    first = hash_password("mypassword", cost=4)
+    second = hash_password("mypassword", cost=4)
+    assert first != second  # Ensure a fresh salt is used
+    assert verify_password("mypassword", first)
+    assert verify_password("mypassword", second)
+    assert not verify_password("otherpassword", first)
+
+
+def test_verify_legacy_hash():
+    """
+    Test verification and rehash detection of unsalted SHA-256 hashes.
+    """
+    legacy = hashlib.sha256("mypassword".encode()).hexdigest()
+    assert is_legacy_hash(legacy)
+    assert verify_password("mypassword", legacy)
+    assert not verify_password("otherpassword", legacy)
+    assert needs_rehash(legacy)
+
+
+def test_needs_rehash_on_cost_change():
+    """
+    Test that a hash created with another cost is flagged for rehashing.
+    """
+    stored = hash_password("mypassword", cost=4)
+    assert not needs_rehash(stored, cost=4)
+    assert needs_rehash(stored, cost=5)
+
+
+def test_verify_rejects_out_of_range_cost():
+    """
+    Test that stored hashes with unsupported parameters fail instead of raising.
+    """
+    stored = hash_password("mypassword", cost=4)
+    _, cost, r, p, salt, key = stored.split("$")
+    assert verify_password("mypassword", f"scrypt$30${r}${p}${salt}${key}") is False
+    assert verify_password("mypassword", f"scrypt${cost}$100000${p}${salt}${key}") is False
+    assert verify_password("mypassword", f"scrypt$abc${r}${p}${salt}${key}") is False
+
+
+def test_verify_password_async():
+    """
+    Test that verification in the thread pool returns the same result.
+    """
+    stored = hash_password("mypassword", cost=4)
+    assert verify_password_async("mypassword", stored).result() is True
+    assert verify_password_async("wrong", stored).result() is False
+
+
+def test_verification_cache_ttl_and_size():
+    """
+    Test that cached verifications expire and the cache stays bounded.
+    """
+    cache = VerificationCache(ttl=0.05, max_entries=2)
+    cache.add("alice", "hash", "pw")
+    assert cache.check("alice", "hash", "pw")
+    assert not cache.check("alice", "newhash", "pw")  # Ensure a changed hash misses
+    cache.add("bob", "hash", "pw")
+    cache.add("carol", "hash", "pw")
+    assert len(cache) == 2  # Ensure oldest entry was evicted
+    time.sleep(0.06)
+    assert not cache.check("bob", "hash", "pw")  # Ensure entry expired
+
+
+if __name__ == "__main__":
+    pytest.main()
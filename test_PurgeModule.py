@@ -0,0 +1,99 @@
+import pytest
+import sqlite3
+import time
+from DBModule import User, Habit, Streak, create_tables
+from PurgeModule import Purger, PurgeWorker, purge_deleted_users
+
+
+def get_test_db(path=":memory:"):
+    """
+    Create a test database with two users and their predefined habits.
+    """
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA foreign_keys = ON;")
+    create_tables(db)
+    for name in ("alice", "bob"):
+        user = User.add_user(db, name, "password123", f"{name}@example.com")
+        Habit.add_predefined_habits(db, user)
+    return db
+
+
+def count(db, table):
+    return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_soft_delete_hides_user_and_frees_username():
+    """
+    Test that a deleted user is invisible to reads but the rows stay until purged.
+    """
+    db = get_test_db()
+    alice = User.find_user(db, "alice")
+    assert User.delete_user_by_name(db, "alice") is True
+    assert User.find_user(db, "alice") is None
+    assert User.find_user_by_id(db, alice.user_id) is None
+    assert Habit.list_habits_for_user(db, alice) == []
+    assert Habit.add_habit(db, alice, "New", "New habit", "2025-01-01", "Daily") is None
+    assert count(db, "habits") == 10  # Rows are only tombstoned
+    assert User.add_user(db, "alice", "password123", "alice@example.com") is not None  # Username is free again
+    assert User.delete_user_by_name(db, "nobody") is False
+    db.close()
+
+
+def test_purge_removes_only_deleted_users():
+    """
+    Test that purging removes tombstoned users with their habits and streaks.
+    """
+    db = get_test_db()
+    bob = User.find_user(db, "bob")
+    User.delete_user_by_name(db, "alice")
+    stats = purge_deleted_users(db, chunk_size=2)
+    assert stats["users"] == 1
+    assert stats["rows"] == 11  # 5 streaks, 5 habits, 1 user
+    assert stats["chunks"] > 3  # Deleted in several chunks
+    assert count(db, "users") == 1
+    assert count(db, "habits") == 5
+    assert count(db, "streaks") == 5
+    assert len(Habit.list_habits_for_user(db, bob)) == 5
+    assert purge_deleted_users(db)["users"] == 0
+    db.close()
+
+
+def test_purge_respects_time_slice():
+    """
+    Test that a chunk running longer than the time slice is retried smaller.
+    """
+    db = get_test_db()
+    User.delete_user_by_name(db, "alice")
+    purger = Purger(db, chunk_size=1000, time_slice=0.0, progress_steps=1)  # Every statement is interrupted
+    with pytest.raises(RuntimeError):
+        purger.purge()
+    assert purger.stats.interrupted > 0
+    assert purger.chunk_size == 1  # Chunk size was halved down to the minimum
+    assert count(db, "habits") == 10  # Interrupted chunks were rolled back
+    db.close()
+
+
+def test_purge_worker(tmp_path):
+    """
+    Test that the background worker purges deleted users with its own connection.
+    """
+    path = str(tmp_path / "test.db")
+    db = get_test_db(path)
+    User.delete_user_by_name(db, "alice")
+    worker = PurgeWorker(path, interval=0.01)
+    worker.start()
+    try:
+        for _ in range(500):
+            if worker.stats is not None and worker.stats.users == 1:
+                break
+            worker.wake()
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+    assert count(db, "users") == 1
+    assert count(db, "streaks") == 5
+    db.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,84 @@
+import pytest
+import contextlib
+import io
+from datetime import date
+import AnalyticalModule
+import QueryModule
+from QueryModule import SQL, QueryPlanError, TrackingConnection, check_query_plans, register
+from DBModule import User, Habit, Streak, create_tables, get_db, close_db
+
+
+def get_test_db(factory=None):
+    """
+    Create a test database in memory with one user and the predefined habits.
+    """
+    db = get_db(":memory:", factory=factory) if factory else get_db(":memory:")
+    create_tables(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+        Habit.add_predefined_habits(db, user)
+    return db, user
+
+
+def test_hot_statements_use_indexes():
+    """
+    Test that no hot statement scans a whole table on a freshly created database.
+    """
+    db, _ = get_test_db()
+    plans = check_query_plans(db)
+    assert "get_streak" in plans
+    assert "archived_count" not in plans  # completion_archive does not exist yet
+    close_db(db)
+
+
+def test_check_query_plans_detects_full_scans():
+    """
+    Test that the debug check fails when a hot statement loses its index.
+    """
+    db, _ = get_test_db()
+    db.execute("DROP INDEX idx_streaks_user_habit")
+    db.execute("DROP INDEX idx_streaks_habit_id")
+    with pytest.raises(QueryPlanError, match="get_streak"):
+        check_query_plans(db)
+    close_db(db)
+
+
+def test_hot_paths_hit_statement_cache():
+    """
+    Test that the dashboard and completion paths only run registered statements,
+    so after the first round every statement comes from the cache.
+    """
+    db, user = get_test_db(TrackingConnection)
+    assert db.cached_statements == QueryModule.cache_size() >= len(SQL)
+    habit = Habit.list_habits_for_user(db, user)[0]
+    db.statements = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for day in (1, 2, 3):
+            User.find_user(db, "testuser")
+            User.find_user_by_id(db, user.user_id)
+            Habit.list_habits_for_user(db, user)
+            habit.complete(db, user.user_id, date(2025, 3, day))
+            Streak.get_streak(db, user.user_id, habit.habit_id)
+            habit.list_completions(db, user.user_id, date(2025, 3, 1))
+            AnalyticalModule.completion_count(db, user, habit)
+            Habit.search(db, user, "water")
+    registered = set(SQL.values())
+    assert set(db.statements) <= registered
+    assert db.misses() == len(set(db.statements))  # Only the first execution of each statement prepares it
+    close_db(db)
+
+
+def test_register_rejects_conflicting_statements():
+    """
+    Test that a name can only be registered once, and that the text is normalized.
+    """
+    assert register("get_streak", """
+        SELECT current_streak, longest_streak, last_completed
+        FROM streaks WHERE user_id = ? AND habit_id = ?
+    """) == SQL["get_streak"]
+    with pytest.raises(ValueError):
+        register("get_streak", "SELECT 1")
+
+
+if __name__ == "__main__":
+    pytest.main()
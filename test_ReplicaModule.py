@@ -0,0 +1,99 @@
+import pytest
+import sqlite3
+import threading
+import AnalyticalModule
+from DBModule import User, Habit, Daily, create_tables, get_db
+from ReplicaModule import ReplicaManager
+
+
+def get_test_db(path):
+    """
+    Create a test database file with one user and one habit.
+    """
+    db = get_db(str(path))
+    create_tables(db)
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    habit_id = Habit.add_habit(db, user, "Exercise", "Morning run", "2025-01-01", "Daily")
+    return db, user, habit_id
+
+
+def test_refresh_creates_read_only_replica(tmp_path):
+    """
+    Test that a refreshed replica has the primary's data and rejects writes.
+    """
+    db, user, habit_id = get_test_db(tmp_path / "primary.db")
+    manager = ReplicaManager(str(tmp_path / "primary.db"), pages_per_step=1)
+    assert manager.lag() is None  # No replica before the first refresh
+    manager.refresh()
+    with manager.reader() as replica:
+        assert replica.execute("SELECT COUNT(*) FROM habits").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            replica.execute("DELETE FROM habits")
+    stats = manager.stats()
+    assert stats["snapshots"] == 1
+    assert stats["lag_seconds"] >= 0
+    assert stats["last_snapshot_seconds"] >= 0
+    db.close()
+
+
+def test_refresh_with_concurrent_writers(tmp_path):
+    """
+    Test that snapshots complete while other connections keep writing.
+    """
+    path = str(tmp_path / "primary.db")
+    db, user, habit_id = get_test_db(path)
+    db.close()
+    manager = ReplicaManager(path, pages_per_step=1, step_pause=0.0005, max_restarts=2)
+    stop = threading.Event()
+    written = []
+
+    def writer(n):
+        conn = sqlite3.connect(path, timeout=10)
+        i = 0
+        while not stop.is_set():
+            conn.execute("INSERT INTO habits (user_id, habit_name, habit_type) VALUES (?, ?, 'Daily')",
+                         (user.user_id, f"habit {n}-{i}"))
+            conn.commit()
+            i += 1
+        written.append(i)
+        conn.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for _ in range(3):
+        manager.refresh()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert sum(written) > 0  # Ensure writers were not blocked
+    manager.refresh()
+    with manager.reader() as replica:
+        assert replica.execute("SELECT COUNT(*) FROM habits").fetchone()[0] == 1 + sum(written)
+    assert manager.stats()["snapshots"] == 4
+
+
+def test_analytics_reads_from_replica(tmp_path):
+    """
+    Test that the analysis helpers read from the replica while writes go to the primary.
+    """
+    db, user, habit_id = get_test_db(tmp_path / "primary.db")
+    manager = ReplicaManager(str(tmp_path / "primary.db"))
+    manager.refresh()
+    AnalyticalModule.use_replicas(manager)
+    try:
+        Daily(habit_id, "Exercise", "Morning run", "2025-01-01").complete(db, user.user_id)
+        streak = AnalyticalModule.longest_streak_for_habit(db, user, Daily(habit_id, "", "", ""))
+        assert streak.current_streak == 0  # Replica does not have the new completion yet
+        manager.refresh()
+        streak = AnalyticalModule.longest_streak_for_habit(db, user, Daily(habit_id, "", "", ""))
+        assert streak.current_streak == 1
+        AnalyticalModule.use_replicas(manager, max_lag=-1)  # Too stale, reads fall back to primary
+        assert len(AnalyticalModule.all_habits(db, user)) == 1
+    finally:
+        AnalyticalModule.use_replicas(None)
+    db.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,108 @@
+import pytest
+import sqlite3
+import time
+from DBModule import User, create_tables, hash_password
+from SessionModule import SessionManager
+
+
+def get_test_db():
+    """
+    Create a test database in memory with one registered user.
+    """
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    User.add_user(db, "testuser", hash_password("password123", cost=4), "testuser@example.com")
+    return db
+
+
+def test_login_and_resolve_without_queries():
+    """
+    Test that a token resolves to the user without running any SQL.
+    """
+    db = get_test_db()
+    sessions = SessionManager()
+    token = sessions.login(db, "testuser", "password123")
+    assert token is not None
+    statements = []
+    db.set_trace_callback(statements.append)
+    user = sessions.resolve(token)
+    db.set_trace_callback(None)
+    assert user.username == "testuser"
+    assert statements == []  # Ensure users table was not touched
+    assert sessions.login(db, "testuser", "wrongpassword") is None
+    db.close()
+
+
+def test_resolve_rejects_tampered_and_expired_tokens():
+    """
+    Test that forged, expired and revoked tokens do not resolve.
+    """
+    db = get_test_db()
+    sessions = SessionManager(ttl=1)
+    token = sessions.login(db, "testuser", "password123")
+    session_id, expires_at, signature = token.split(".")
+    assert sessions.resolve(f"{session_id}.{int(expires_at) + 100}.{signature}") is None
+    assert sessions.resolve("garbage") is None
+    assert sessions.revoke(token) is True
+    assert sessions.resolve(token) is None
+    expired = SessionManager(ttl=-1)
+    assert expired.resolve(expired.login(db, "testuser", "password123")) is None
+    db.close()
+
+
+def test_sessions_revoked_on_delete_and_password_change():
+    """
+    Test that deleting a user or changing the password ends their sessions.
+    """
+    db = get_test_db()
+    sessions = SessionManager()
+    token = sessions.login(db, "testuser", "password123")
+    user = sessions.resolve(token)
+    user.update_password(db, hash_password("newpassword", cost=4))
+    assert sessions.resolve(token) is None  # Ensure password change ended the session
+    token = sessions.login(db, "testuser", "newpassword")
+    User.delete_user_by_name(db, "testuser")
+    assert sessions.resolve(token) is None  # Ensure deleted user cannot resolve
+    db.close()
+
+
+def test_resolve_non_ascii_signature():
+    """
+    Test that a token with a non-ASCII signature is rejected instead of raising.
+    """
+    sessions = SessionManager()
+    assert sessions.resolve("a.9999999999.\u00e9") is None
+    assert sessions.revoke("a.9999999999.\u00e9") is False
+
+
+def test_session_table_is_bounded():
+    """
+    Test that the oldest sessions are evicted once the table is full.
+    """
+    db = get_test_db()
+    user = User.find_user(db, "testuser")
+    sessions = SessionManager(max_sessions=2)
+    first = sessions.issue(user)
+    sessions.issue(user)
+    sessions.issue(user)
+    assert len(sessions) == 2
+    assert sessions.resolve(first) is None  # Ensure oldest session was evicted
+    db.close()
+
+
+def test_persisted_sessions_survive_restart():
+    """
+    Test that persisted sessions resolve in a new manager with the same secret.
+    """
+    db = get_test_db()
+    sessions = SessionManager(secret=b"secret", db=db)
+    token = sessions.login(db, "testuser", "password123")
+    restarted = SessionManager(secret=b"secret", db=db)
+    assert restarted.resolve(token).username == "testuser"
+    assert restarted.revoke(token) is True
+    assert SessionManager(secret=b"secret", db=db).resolve(token) is None
+    db.close()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,80 @@
+import pytest
+import sqlite3
+from datetime import date
+import DBModule
+from DBModule import User, Habit, Daily, Streak, create_tables, get_db, close_db
+from WriteBehindModule import CompletionWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """
+    Start a write-behind writer on a file database and route completions through it.
+    """
+    path = str(tmp_path / "test.db")
+    db = get_db(path)
+    create_tables(db)
+    db.close()
+    writer = CompletionWriter(path, interval=60, max_batch=10).start()  # Only full batches and flushes write
+    DBModule.use_write_behind(writer)
+    yield writer
+    DBModule.use_write_behind(None)
+    writer.close()
+
+
+def add_habit(db):
+    user = User.add_user(db, "testuser", "password123", "testuser@example.com")
+    habit_id = Habit.add_habit(db, user, "Exercise", "Morning run", "2025-01-01", "Daily")
+    return user, Daily(habit_id, "Exercise", "Morning run", "2025-01-01")
+
+
+def test_streak_visible_before_commit(writer):
+    """
+    Test that a queued completion is visible right away and written on flush.
+    """
+    db = get_db(writer.path)
+    user, habit = add_habit(db)
+    habit.complete(db, user.user_id, date(2025, 1, 1))
+    habit.complete(db, user.user_id, date(2025, 1, 2))
+    assert Streak.get_streak(db, user.user_id, habit.habit_id).current_streak == 2
+    assert db.execute("SELECT current_streak FROM streaks").fetchone()[0] == 0  # Not committed yet
+    assert habit.complete(db, user.user_id, date(2025, 1, 2))[1] is False  # Same period, from memory
+    assert writer.flush(timeout=10)
+    assert db.execute("SELECT current_streak, last_completed FROM streaks").fetchone() == (2, "2025-01-02")
+    assert habit.list_completions(db, user.user_id) == [date(2025, 1, 1), date(2025, 1, 2)]
+    assert writer.pending_streak(user.user_id, habit.habit_id) is None  # Left the in-memory state
+    close_db(db)
+
+
+def test_group_commit(writer):
+    """
+    Test that full batches are committed together without waiting for the interval.
+    """
+    db = get_db(writer.path)
+    user, habit = add_habit(db)
+    for day in range(1, 26):
+        habit.complete(db, user.user_id, date(2025, 1, day))
+    assert writer.flush(timeout=10)
+    assert writer.stats.events == 25
+    assert writer.stats.batches <= 3
+    assert writer.stats.largest_batch == 10
+    assert Streak.get_streak(db, user.user_id, habit.habit_id).longest_streak == 25
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    close_db(db)
+
+
+def test_close_db_flushes(writer):
+    """
+    Test that close_db commits queued completions before closing.
+    """
+    db = get_db(writer.path)
+    user, habit = add_habit(db)
+    habit.complete(db, user.user_id, date(2025, 1, 1))
+    close_db(db)
+    check = sqlite3.connect(writer.path)
+    assert check.execute("SELECT COUNT(*) FROM completions").fetchone()[0] == 1
+    check.close()
+
+
+if __name__ == "__main__":
+    pytest.main()